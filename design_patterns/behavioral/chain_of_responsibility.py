@@ -7,23 +7,50 @@ handler in the chain.
 from __future__ import annotations
 
 import abc
-from typing import Sequence
+import bisect
+import collections
+import heapq
+import itertools
+import random
+import threading
+import time
+import timeit
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterable, Sequence
+
+import numpy as np
 
 
 class Handler(abc.ABC):
+    # Requests that the handler accepts, and only those, if it declares them
+    accepted_requests: range | None = None
+
     def __init__(self, successor: "Handler" | None = None) -> None:
         self._successor = successor
 
     def handle(self, request: int) -> bool:
-        has_been_handled = self._handle(request)
-        if not has_been_handled:
-            self._successor.handle(request)
+        # Walk the chain iteratively, so that long chains do not hit the recursion limit
+        handler = self
+        while handler is not None:
+            if handler._handle(request):
+                return True
+            handler = handler._successor
+        return False
 
     @abc.abstractmethod
     def _handle(self, request: int) -> bool: ...
 
+    def _handle_many(self, requests: np.ndarray) -> Sequence[bool] | np.ndarray:
+        """Handle a batch of requests, returning whether each of them has been handled.
+
+        Handlers can override this, to process whole batches at once.
+        """
+        return [self._handle(request) for request in requests.tolist()]
+
 
 class ConcreteHandler(Handler):
+    accepted_requests = range(1, 11)
+
     def _handle(self, request: int) -> bool:
         if 0 < request <= 10:
             print(f"Request {request} has been handled by handler 1")
@@ -37,17 +64,260 @@ class DefaultHandler(Handler):
         return True
 
 
+class CompiledChain:
+    """Route requests to the first handler of a chain that accepts them, in logarithmic time.
+
+    The accepted requests declared by handlers are compiled into an interval index, which gives the first declaring
+    handler for any request. Handlers that do not declare their accepted requests, such as the default handler,
+    are still tried in order, but only if they come before that handler in the chain. Requests rejected by the
+    declaring handler are passed down the rest of the chain, as usual.
+    """
+
+    _NO_HANDLER = -1
+
+    def __init__(self, head: Handler) -> None:
+        self._handlers: list[Handler] = []
+        handler: Handler | None = head
+        while handler is not None:
+            self._handlers.append(handler)
+            handler = handler._successor
+
+        self._undeclared: list[tuple[int, Handler]] = []
+        events: list[tuple[int, int, int]] = []
+        for position, handler in enumerate(self._handlers):
+            accepted = handler.accepted_requests
+            if accepted is None:
+                self._undeclared.append((position, handler))
+            elif accepted.step != 1:
+                raise ValueError("Accepted requests must be contiguous ranges")
+            elif accepted:
+                events.append((accepted.start, position, accepted.stop))
+
+        # Split the requests into intervals with the same first declaring handler, by sweeping over range starts
+        # and stops, while keeping the ranges covering the current interval in a heap ordered by position.
+        events.sort()
+        boundaries = sorted({start for start, _, _ in events} | {stop for _, _, stop in events})
+        self._starts: list[int] = []
+        self._positions: list[int] = []
+        covering: list[tuple[int, int]] = []
+        i_event = 0
+        for boundary in boundaries:
+            while i_event < len(events) and events[i_event][0] <= boundary:
+                _, position, stop = events[i_event]
+                heapq.heappush(covering, (position, stop))
+                i_event += 1
+            while covering and covering[0][1] <= boundary:
+                heapq.heappop(covering)
+            self._starts.append(boundary)
+            self._positions.append(covering[0][0] if covering else self._NO_HANDLER)
+        # For batches, requests before the first boundary get index -1, which selects the trailing "no handler".
+        self._starts_array = np.array(self._starts, dtype=np.int64)
+        self._positions_array = np.array(self._positions + [self._NO_HANDLER], dtype=np.int64)
+
+    def handle(self, request: int) -> bool:
+        index = bisect.bisect_right(self._starts, request) - 1
+        position = self._positions[index] if index >= 0 else self._NO_HANDLER
+        for undeclared_position, handler in self._undeclared:
+            if position != self._NO_HANDLER and undeclared_position > position:
+                break
+            if handler._handle(request):
+                return True
+        if position == self._NO_HANDLER:
+            return False
+        handler = self._handlers[position]
+        if handler._handle(request):
+            return True
+        # The declaring handler may still reject the request, which then goes down the rest of the chain
+        return handler._successor is not None and handler._successor.handle(request)
+
+    def handle_many(self, requests: Iterable[int] | np.ndarray) -> np.ndarray:
+        """Handle a batch of requests, and return those that have not been handled.
+
+        Requests are split by handler in one pass, and each handler receives all of its requests at once. The
+        requests of a given handler keep their order, but handlers process their requests one after the other.
+        """
+        groups, unhandled = self._split(_as_array(requests))
+        rejected = [unhandled]
+        for position, group in groups.items():
+            rejected.append(self._handle_group(position, group))
+        return np.concatenate(rejected)
+
+    def _handle_group(self, position: int, requests: np.ndarray) -> np.ndarray:
+        """Handle the requests of a declaring handler, and return those that the rest of the chain rejects too."""
+        handler = self._handlers[position]
+        rejected = requests[~np.asarray(handler._handle_many(requests), dtype=bool)]
+        if len(rejected) and handler._successor is not None:
+            successor = handler._successor
+            handled = np.fromiter((successor.handle(request) for request in rejected.tolist()), bool, len(rejected))
+            rejected = rejected[~handled]
+        return rejected
+
+    def _split(self, requests: np.ndarray) -> tuple[dict[int, np.ndarray], np.ndarray]:
+        """Group requests by their first declaring handler, and return the requests without one.
+
+        Requests are first offered to the undeclared handlers that come before that handler in the chain.
+        """
+        indices = np.searchsorted(self._starts_array, requests, side="right") - 1
+        positions = self._positions_array[indices]
+        # Requests without a declaring handler are offered to all undeclared handlers
+        n_handlers = len(self._handlers)
+        positions[positions == self._NO_HANDLER] = n_handlers
+        for undeclared_position, handler in self._undeclared:
+            (candidates,) = np.nonzero(positions > undeclared_position)
+            if len(candidates):
+                handled = np.asarray(handler._handle_many(requests[candidates]), dtype=bool)
+                positions[candidates[handled]] = self._NO_HANDLER
+
+        order = np.argsort(positions, kind="stable")
+        sorted_positions = positions[order]
+        group_positions, group_starts = np.unique(sorted_positions, return_index=True)
+        groups = {}
+        unhandled = requests[:0]
+        for position, group in zip(group_positions.tolist(), np.split(requests[order], group_starts[1:])):
+            if position == n_handlers:
+                unhandled = group
+            elif position != self._NO_HANDLER:
+                groups[position] = group
+        return groups, unhandled
+
+
+def _as_array(requests: Iterable[int] | np.ndarray) -> np.ndarray:
+    if isinstance(requests, np.ndarray):
+        return requests.astype(np.int64, copy=False)
+    return np.fromiter(requests, dtype=np.int64)
+
+
+class HandlerCounters:
+    """Throughput and latency of a handler, in a streaming chain."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.n_requests = 0
+        self.n_batches = 0
+        self.busy_time = 0.0
+        self.total_latency = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """Requests handled per second of work."""
+        return self.n_requests / self.busy_time if self.busy_time else 0.0
+
+    @property
+    def mean_latency(self) -> float:
+        """Seconds from receiving a batch of requests until the handler is done with them."""
+        return self.total_latency / self.n_batches if self.n_batches else 0.0
+
+    def record(self, n_requests: int, busy_time: float, latency: float) -> None:
+        with self._lock:
+            self.n_requests += n_requests
+            self.n_batches += 1
+            self.busy_time += busy_time
+            self.total_latency += latency
+
+
+class StreamingChain:
+    """Handle a stream of requests in chunks, which are split and handled by a shared pool of workers.
+
+    The caller only reads the stream, while up to twice as many chunks as workers are being handled, so that a
+    fast stream does not pile up in memory.
+    """
+
+    def __init__(self, chain: CompiledChain, chunk_size: int = 10_000, max_workers: int = 4) -> None:
+        self._chain = chain
+        self._chunk_size = chunk_size
+        self._max_workers = max_workers
+        self.counters: dict[Handler, HandlerCounters] = {}
+
+    def handle_stream(self, requests: Iterable[int]) -> np.ndarray:
+        """Handle all requests of the stream, and return those that have not been handled."""
+        rejected = []
+        requests = iter(requests)
+        with ThreadPoolExecutor(self._max_workers) as executor:
+            futures: collections.deque[Future[np.ndarray]] = collections.deque()
+            while len(chunk := np.fromiter(itertools.islice(requests, self._chunk_size), np.int64)):
+                if len(futures) >= 2 * self._max_workers:
+                    rejected.append(futures.popleft().result())
+                futures.append(executor.submit(self._handle_chunk, chunk, time.perf_counter()))
+            rejected.extend(future.result() for future in futures)
+        return np.concatenate(rejected) if rejected else np.empty(0, dtype=np.int64)
+
+    def _handle_chunk(self, requests: np.ndarray, received: float) -> np.ndarray:
+        groups, unhandled = self._chain._split(requests)
+        rejected = [unhandled]
+        for position, group in groups.items():
+            start = time.perf_counter()
+            rejected.append(self._chain._handle_group(position, group))
+            end = time.perf_counter()
+            handler = self._chain._handlers[position]
+            counters = self.counters.get(handler)
+            if counters is None:
+                counters = self.counters.setdefault(handler, HandlerCounters())
+            counters.record(len(group), end - start, end - received)
+        return np.concatenate(rejected)
+
+
 class Client:
     def __init__(self) -> None:
         default_handler = DefaultHandler()
         self._handler = ConcreteHandler(default_handler)
+        self._chain = CompiledChain(self._handler)
 
     def delegate(self, requests: Sequence[int]) -> None:
         for request in requests:
-            self._handler.handle(request)
+            self._chain.handle(request)
+
+    def delegate_many(self, requests: Iterable[int] | np.ndarray) -> None:
+        self._chain.handle_many(requests)
+
+
+class RangeHandler(Handler):
+    def __init__(self, accepted_requests: range, successor: Handler | None = None) -> None:
+        super().__init__(successor)
+        self.accepted_requests = accepted_requests
+
+    def _handle(self, request: int) -> bool:
+        return request in self.accepted_requests
+
+    def _handle_many(self, requests: np.ndarray) -> np.ndarray:
+        return (requests >= self.accepted_requests.start) & (requests < self.accepted_requests.stop)
+
+
+def benchmark(n_handlers: int = 1_000, n_requests: int = 10_000) -> None:
+    """Compare walking a long chain against routing through the compiled chain."""
+    head: Handler | None = None
+    for i in reversed(range(n_handlers)):
+        head = RangeHandler(range(10 * i, 10 * (i + 1)), head)
+    chain = CompiledChain(head)
+    requests = [random.randrange(10 * n_handlers) for _ in range(n_requests)]
+
+    time_walked = timeit.timeit(lambda: [head.handle(request) for request in requests], number=1)
+    time_compiled = timeit.timeit(lambda: [chain.handle(request) for request in requests], number=1)
+    print(f"{n_handlers} handlers, {n_requests} requests: walked {time_walked:.3f}s, compiled {time_compiled:.4f}s")
+
+
+def benchmark_many(n_handlers: int = 1_000, n_requests: int = 1_000_000) -> None:
+    """Compare per-request dispatch against batch and streaming dispatch."""
+    head: Handler | None = None
+    for i in reversed(range(n_handlers)):
+        head = RangeHandler(range(10 * i, 10 * (i + 1)), head)
+    chain = CompiledChain(head)
+    requests = np.random.default_rng().integers(10 * n_handlers, size=n_requests)
+    request_list = requests.tolist()
+
+    time_single = timeit.timeit(lambda: [chain.handle(request) for request in request_list], number=1)
+    time_batch = timeit.timeit(lambda: chain.handle_many(requests), number=1)
+    streaming = StreamingChain(chain, chunk_size=100_000)
+    time_stream = timeit.timeit(lambda: streaming.handle_stream(request_list), number=1)
+    print(f"{n_requests} requests: one by one {time_single:.3f}s, batch {time_batch:.3f}s, stream {time_stream:.3f}s")
+    counters = streaming.counters[head]
+    print(f"First handler: {counters.throughput:.0f} requests/s, mean latency {counters.mean_latency * 1e3:.2f}ms")
 
 
 if __name__ == "__main__":
     client = Client()
     requests = [2, 5, 30]
     client.delegate(requests)
+    client.delegate_many(requests)
+
+    benchmark()
+    benchmark_many()
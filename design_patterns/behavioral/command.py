@@ -6,12 +6,32 @@ This decouples the sender from the receiver.
 from __future__ import annotations
 
 import abc
+import mmap
+import os
+import struct
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Iterable, Iterator, Literal, Sequence
 
 
 class Command(abc.ABC):
     @abc.abstractmethod
     def execute(self) -> None: ...
 
+    def to_bytes(self) -> bytes:
+        """Serialize the state of the command, for the command log.
+
+        Commands without state need nothing; the others must override this, along with `from_bytes()`.
+        """
+        if vars(self):
+            raise NotImplementedError(f"{type(self).__name__} has state, but does not implement to_bytes()")
+        return b""
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> Command:
+        return cls()
+
 
 class Copy(Command):
     def execute(self) -> None:
@@ -31,8 +51,9 @@ class Save(Command):
 class Macro:
     """This class does not care about the details of the commands."""
 
-    def __init__(self) -> None:
+    def __init__(self, journal: CommandLog | None = None) -> None:
         self._commands: list[Command] = []
+        self._journal = journal
 
     def add(self, command: Command) -> None:
         self._commands.append(command)
@@ -40,6 +61,250 @@ class Macro:
     def run(self) -> None:
         for command in self._commands:
             command.execute()
+            if self._journal is not None:
+                self._journal.append(command)
+        if self._journal is not None:
+            self._journal.commit()
+
+
+class Sleep(Command):
+    """Stand-in for an I/O-bound command."""
+
+    def __init__(self, seconds: float) -> None:
+        self._seconds = seconds
+
+    def execute(self) -> None:
+        time.sleep(self._seconds)
+
+    def to_bytes(self) -> bytes:
+        return _SECONDS.pack(self._seconds)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> Sleep:
+        (seconds,) = _SECONDS.unpack(payload)
+        return cls(seconds)
+
+
+_SECONDS = struct.Struct("<d")
+
+
+class CommandLog:
+    """Durable, append-only log of executed commands, in a memory-mapped file.
+
+    The file starts with a header holding the size of its committed part, followed by one record per command: the
+    index of its type in `command_types`, the size of its payload, and the payload itself. Appended commands are
+    committed in groups, which syncs the records and then the header, so that a crash loses at most the last group.
+    """
+
+    _MAGIC = b"CMDLOG01"
+    _HEADER = struct.Struct("<8sQ")
+    _RECORD = struct.Struct("<HI")
+    _GROWTH = 64 * 2**20
+
+    def __init__(self, path: str, command_types: Sequence[type[Command]], group_size: int = 1_000) -> None:
+        self._command_types = list(command_types)
+        self._type_ids = {command_type: i for i, command_type in enumerate(self._command_types)}
+        self._group_size = group_size
+        self._n_pending = 0
+        self._file = open(path, "a+b")
+        size = os.fstat(self._file.fileno()).st_size
+        if 0 < size < self._HEADER.size:
+            self._file.close()
+            raise ValueError(f"{path} is not a command log")
+        if size == 0:
+            self._file.truncate(self._GROWTH)
+            os.fsync(self._file.fileno())
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, committed = self._HEADER.unpack_from(self._mmap)
+        if magic != self._MAGIC:
+            if magic.strip(b"\0"):
+                self._mmap.close()
+                self._file.close()
+                raise ValueError(f"{path} is not a command log")
+            committed = self._HEADER.size
+            self._HEADER.pack_into(self._mmap, 0, self._MAGIC, committed)
+        # Records after the committed part, if any, were lost in a crash and get overwritten.
+        self._committed = committed
+        self._offset = committed
+
+    def append(self, command: Command) -> None:
+        type_id = self._type_ids.get(type(command))
+        if type_id is None:
+            raise ValueError(f"{type(command).__name__} is not one of the command types of the log")
+        payload = command.to_bytes()
+        end = self._offset + self._RECORD.size + len(payload)
+        if end > len(self._mmap):
+            self._grow(end)
+        self._RECORD.pack_into(self._mmap, self._offset, type_id, len(payload))
+        self._mmap[self._offset + self._RECORD.size : end] = payload
+        self._offset = end
+        self._n_pending += 1
+        if self._n_pending >= self._group_size:
+            self.commit()
+
+    def commit(self) -> None:
+        if self._offset == self._committed:
+            return
+        start = self._committed - self._committed % mmap.PAGESIZE
+        self._mmap.flush(start, self._offset - start)
+        self._HEADER.pack_into(self._mmap, 0, self._MAGIC, self._offset)
+        self._mmap.flush(0, self._HEADER.size)
+        self._committed = self._offset
+        self._n_pending = 0
+
+    def close(self) -> None:
+        self.commit()
+        self._mmap.close()
+        self._file.close()
+
+    def replay(self) -> Iterator[Command]:
+        """Deserialize the commands committed so far, in the order they were appended.
+
+        Commands can be appended while replaying, since no view of the mapping is held in between.
+        """
+        offset, end = self._HEADER.size, self._committed
+        unpack_record, record_size, command_types = self._RECORD.unpack_from, self._RECORD.size, self._command_types
+        while offset < end:
+            type_id, payload_size = unpack_record(self._mmap, offset)
+            offset += record_size
+            yield command_types[type_id].from_bytes(self._mmap[offset : offset + payload_size])
+            offset += payload_size
+
+    def _grow(self, size: int) -> None:
+        self._mmap.resize(max(size, len(self._mmap) + self._GROWTH))
+        os.fsync(self._file.fileno())
+
+
+def _execute_batch(commands: list[Command]) -> list[float]:
+    durations = []
+    for command in commands:
+        start = time.perf_counter()
+        command.execute()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+class ParallelMacro(Macro):
+    """Run independent commands concurrently, in a thread pool or in a process pool.
+
+    Each command runs once all the commands it depends on are done. Ready commands are dispatched in batches of up
+    to `batch_size`, which reduces the dispatch overhead of very small commands. In a process pool, commands are
+    copied to the worker processes, so changes to their state are not seen by the caller. Commands are journaled
+    as their batches complete, which is always after the commands they depend on.
+    """
+
+    def __init__(
+        self,
+        mode: Literal["thread", "process"] = "thread",
+        max_workers: int = 8,
+        batch_size: int = 1,
+        journal: CommandLog | None = None,
+    ) -> None:
+        super().__init__(journal)
+        self._mode = mode
+        self._max_workers = max_workers
+        self._batch_size = batch_size
+        self._dependencies: dict[Command, list[Command]] = {}
+        self.durations: dict[Command, float] = {}
+
+    def add(self, command: Command, depends_on: Iterable[Command] = ()) -> None:
+        """Add a command, which runs after the given commands, which must have been added before."""
+        if command in self._dependencies:
+            raise ValueError(f"{type(command).__name__} command was already added")
+        dependencies = list(depends_on)
+        for dependency in dependencies:
+            if dependency not in self._dependencies:
+                raise ValueError(f"{type(dependency).__name__} dependency must be added before the commands using it")
+        super().add(command)
+        self._dependencies[command] = dependencies
+
+    def run(self) -> None:
+        # Commands become ready once all their dependencies are done, which can be found from the dependents
+        n_unfinished = {command: len(dependencies) for command, dependencies in self._dependencies.items()}
+        dependents: dict[Command, list[Command]] = {command: [] for command in self._commands}
+        for command, dependencies in self._dependencies.items():
+            for dependency in dependencies:
+                dependents[dependency].append(command)
+        ready = [command for command in self._commands if not n_unfinished[command]]
+        running: dict[Future[list[float]], list[Command]] = {}
+        self.durations = {}
+        with self._create_executor() as executor:
+            while ready or running:
+                for i in range(0, len(ready), self._batch_size):
+                    batch = ready[i : i + self._batch_size]
+                    running[executor.submit(_execute_batch, batch)] = batch
+                ready = []
+                completed, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    batch = running.pop(future)
+                    self.durations.update(zip(batch, future.result()))
+                    for command in batch:
+                        for dependent in dependents[command]:
+                            n_unfinished[dependent] -= 1
+                            if not n_unfinished[dependent]:
+                                ready.append(dependent)
+                    if self._journal is not None:
+                        for command in batch:
+                            self._journal.append(command)
+        if self._journal is not None:
+            self._journal.commit()
+
+    def critical_path(self) -> tuple[list[Command], float]:
+        """Find the chain of dependent commands that took the longest, during the last run."""
+        durations: dict[Command, float] = {}
+        predecessors: dict[Command, Command | None] = {}
+        # Commands are recorded in the order they were completed, so dependencies always come first
+        for command, duration in self.durations.items():
+            predecessor = max(self._dependencies[command], key=durations.__getitem__, default=None)
+            predecessors[command] = predecessor
+            durations[command] = duration + (durations[predecessor] if predecessor is not None else 0.0)
+
+        command = max(durations, key=durations.__getitem__, default=None)
+        total = durations.get(command, 0.0)
+        path = []
+        while command is not None:
+            path.append(command)
+            command = predecessors[command]
+        return path[::-1], total
+
+    def _create_executor(self) -> Executor:
+        if self._mode == "process":
+            return ProcessPoolExecutor(self._max_workers)
+        return ThreadPoolExecutor(self._max_workers)
+
+
+def benchmark(n_commands: int = 200, seconds: float = 0.01) -> None:
+    """Compare running independent I/O-bound commands in sequence and concurrently."""
+    macro = Macro()
+    parallel_macro = ParallelMacro(max_workers=16, batch_size=4)
+    for _ in range(n_commands):
+        macro.add(Sleep(seconds))
+        parallel_macro.add(Sleep(seconds))
+
+    for label, macro in [("Sequential", macro), ("Parallel", parallel_macro)]:
+        start = time.perf_counter()
+        macro.run()
+        print(f"{label}: {n_commands} commands in {time.perf_counter() - start:.2f}s")
+
+
+def benchmark_log(n_commands: int = 10_000_000) -> None:
+    """Measure append throughput and replay speed of the command log."""
+    commands = [Copy(), Paste(), Sleep(0.0), Save()]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "commands.log")
+        journal = CommandLog(path, [Copy, Paste, Save, Sleep], group_size=10_000)
+        start = time.perf_counter()
+        for i in range(n_commands):
+            journal.append(commands[i % 4])
+        journal.close()
+        time_append = time.perf_counter() - start
+
+        journal = CommandLog(path, [Copy, Paste, Save, Sleep])
+        start = time.perf_counter()
+        n_replayed = sum(1 for _ in journal.replay())
+        time_replay = time.perf_counter() - start
+        journal.close()
+    print(f"Appended {n_commands / time_append:.0f} commands/s, replayed {n_replayed / time_replay:.0f} commands/s")
 
 
 if __name__ == "__main__":
@@ -48,3 +313,26 @@ if __name__ == "__main__":
     macro.add(Paste())
     macro.add(Save())
     macro.run()
+
+    for mode in ("thread", "process"):
+        parallel_macro = ParallelMacro(mode)
+        copy, paste, save = Copy(), Paste(), Save()
+        parallel_macro.add(copy)
+        parallel_macro.add(paste, depends_on=[copy])
+        parallel_macro.add(Sleep(0.1))
+        parallel_macro.add(save, depends_on=[copy, paste])
+        parallel_macro.run()
+        commands, duration = parallel_macro.critical_path()
+        print(f"Critical path: {' -> '.join(type(command).__name__ for command in commands)} ({duration:.2f}s)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = CommandLog(os.path.join(directory, "commands.log"), [Copy, Paste, Save])
+        macro = Macro(journal)
+        macro.add(Copy())
+        macro.add(Save())
+        macro.run()
+        print("Replaying:", *(type(command).__name__ for command in journal.replay()))
+        journal.close()
+
+    benchmark()
+    benchmark_log()
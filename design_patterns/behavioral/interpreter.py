@@ -3,6 +3,12 @@
 from __future__ import annotations
 
 import abc
+import random
+import re
+import timeit
+from typing import Callable, Mapping
+
+import numpy as np
 
 
 class Expression(abc.ABC):
@@ -19,6 +25,21 @@ class BooleanLiteral(Expression):
         return self._value
 
 
+class Variable(Expression):
+    """Named input, whose value can be set between evaluations."""
+
+    def __init__(self, name: str, value: bool = False) -> None:
+        self._name = name
+        self.value = value
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    def interpret(self) -> bool:
+        return self.value
+
+
 # Non-terminal expressions (nodes in the syntax tree)
 class AndExpression(Expression):
     def __init__(self, left: Expression, right: Expression) -> None:
@@ -38,6 +59,376 @@ class OrExpression(Expression):
         return self._left.interpret() or self._right.interpret()
 
 
+class NotExpression(Expression):
+    def __init__(self, operand: Expression) -> None:
+        self._operand = operand
+
+    def interpret(self) -> bool:
+        return not self._operand.interpret()
+
+
+# Targets of the flat instruction list that end the evaluation
+_TRUE = -1
+_FALSE = -2
+
+
+class CompiledExpression(Expression):
+    """Flat instruction list, equivalent to a tree of `AndExpression`, `OrExpression` and `NotExpression` nodes.
+
+    Each instruction evaluates one terminal expression and jumps to the next instruction, depending on the outcome.
+    Literals are folded away during compilation, and no recursion is needed for evaluation.
+    """
+
+    def __init__(self, entry: int, terminals: list[Expression], if_true: list[int], if_false: list[int]) -> None:
+        self._entry = entry
+        self._terminals = terminals
+        self._if_true = if_true
+        self._if_false = if_false
+
+    def interpret(self) -> bool:
+        terminals, if_true, if_false = self._terminals, self._if_true, self._if_false
+        index = self._entry
+        while index >= 0:
+            index = if_true[index] if terminals[index].interpret() else if_false[index]
+        return index == _TRUE
+
+
+def compile_expression(expression: Expression) -> CompiledExpression:
+    """Flatten an expression tree once, so that it can be evaluated many times faster.
+
+    Terminals are evaluated in the same order as `interpret()` does, and are skipped by the same short-circuiting.
+    """
+    terminals: list[Expression] = []
+    if_true: list[int] = []
+    if_false: list[int] = []
+    # The right operand is compiled first, since its entry point is the jump target of the left operand.
+    entries: list[int] = []
+    stack: list[tuple[Expression, int, int, bool]] = [(expression, _TRUE, _FALSE, False)]
+    while stack:
+        node, node_if_true, node_if_false, is_right_compiled = stack.pop()
+        if is_right_compiled:
+            right_entry = entries.pop()
+            if type(node) is AndExpression:
+                stack.append((node._left, right_entry, node_if_false, False))
+            else:
+                stack.append((node._left, node_if_true, right_entry, False))
+        elif type(node) in (AndExpression, OrExpression):
+            stack.append((node, node_if_true, node_if_false, True))
+            stack.append((node._right, node_if_true, node_if_false, False))
+        elif type(node) is NotExpression:
+            stack.append((node._operand, node_if_false, node_if_true, False))
+        elif type(node) is BooleanLiteral:
+            entries.append(node_if_true if node._value else node_if_false)
+        else:
+            entries.append(len(terminals))
+            terminals.append(node)
+            if_true.append(node_if_true)
+            if_false.append(node_if_false)
+    return CompiledExpression(entries.pop(), terminals, if_true, if_false)
+
+
+def evaluate_batch(expression: Expression, columns: Mapping[str, np.ndarray]) -> np.ndarray:
+    """Evaluate an expression over many records at once.
+
+    Each variable is bound to a boolean column, and operators are applied elementwise to whole columns.
+    Subexpressions shared by several parents are evaluated only once.
+    """
+    n_rows = len(next(iter(columns.values()))) if columns else 1
+    # Post-order traversal, with the values of evaluated operands collected on a stack
+    values: list[np.ndarray | np.bool_] = []
+    evaluated: dict[int, np.ndarray | np.bool_] = {}
+    stack: list[tuple[Expression, bool]] = [(expression, False)]
+    while stack:
+        node, are_operands_evaluated = stack.pop()
+        if are_operands_evaluated:
+            if type(node) is NotExpression:
+                values.append(np.logical_not(values.pop()))
+            else:
+                right = values.pop()
+                left = values.pop()
+                operator = np.logical_and if type(node) is AndExpression else np.logical_or
+                values.append(operator(left, right))
+            evaluated[id(node)] = values[-1]
+        elif id(node) in evaluated:
+            values.append(evaluated[id(node)])
+        elif type(node) in (AndExpression, OrExpression):
+            stack.append((node, True))
+            stack.append((node._right, False))
+            stack.append((node._left, False))
+        elif type(node) is NotExpression:
+            stack.append((node, True))
+            stack.append((node._operand, False))
+        elif type(node) is BooleanLiteral:
+            values.append(np.bool_(node._value))
+        elif type(node) is Variable:
+            values.append(np.asarray(columns[node.name], dtype=bool))
+        else:
+            raise TypeError(f"Cannot evaluate {type(node).__name__} over columns")
+    return np.broadcast_to(values.pop(), (n_rows,)).copy()
+
+
+class IncrementalExpression(Expression):
+    """Cache the value of every node, and only recompute the nodes affected by a changed variable.
+
+    Variables must be changed through `set_value()`, which marks the path from the variable to the root as dirty.
+    The next evaluation then costs as much as the depth of the tree, rather than its size.
+    """
+
+    def __init__(self, expression: Expression) -> None:
+        self._root = expression
+        self._values: dict[int, bool] = {}
+        self._parents: dict[int, list[Expression]] = {id(expression): []}
+        # Post-order position of each node, so that dirty operands are recomputed before their parents
+        self._positions: dict[int, int] = {}
+        self._variables: dict[str, list[Variable]] = {}
+        self._dirty: dict[int, Expression] = {}
+
+        is_visited: set[int] = set()
+        stack: list[tuple[Expression, bool]] = [(expression, False)]
+        while stack:
+            node, are_operands_evaluated = stack.pop()
+            if are_operands_evaluated:
+                self._positions[id(node)] = len(self._positions)
+                self._values[id(node)] = self._evaluate(node)
+            elif id(node) not in is_visited:
+                is_visited.add(id(node))
+                if type(node) is Variable:
+                    self._variables.setdefault(node.name, []).append(node)
+                stack.append((node, True))
+                for operand in reversed(self._operands(node)):
+                    self._parents.setdefault(id(operand), []).append(node)
+                    stack.append((operand, False))
+
+    def set_value(self, name: str, value: bool) -> None:
+        for variable in self._variables.get(name, ()):
+            if variable.value != value:
+                variable.value = value
+                self._mark_dirty(variable)
+
+    def interpret(self) -> bool:
+        for node in sorted(self._dirty.values(), key=lambda node: self._positions[id(node)]):
+            self._values[id(node)] = self._evaluate(node)
+        self._dirty.clear()
+        return self._values[id(self._root)]
+
+    def _mark_dirty(self, node: Expression) -> None:
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if id(node) not in self._dirty:
+                self._dirty[id(node)] = node
+                stack.extend(self._parents[id(node)])
+
+    def _evaluate(self, node: Expression) -> bool:
+        """Evaluate a node from the cached values of its operands."""
+        if type(node) is AndExpression:
+            return self._values[id(node._left)] and self._values[id(node._right)]
+        if type(node) is OrExpression:
+            return self._values[id(node._left)] or self._values[id(node._right)]
+        if type(node) is NotExpression:
+            return not self._values[id(node._operand)]
+        return node.interpret()
+
+    @staticmethod
+    def _operands(node: Expression) -> tuple[Expression, ...]:
+        if type(node) in (AndExpression, OrExpression):
+            return node._left, node._right
+        if type(node) is NotExpression:
+            return (node._operand,)
+        if type(node) in (BooleanLiteral, Variable):
+            return ()
+        raise TypeError(f"Cannot evaluate {type(node).__name__} incrementally")
+
+
+class Parser:
+    """Parse rules written as text, e.g. "a and not (b or false)".
+
+    Identical subexpressions are interned into a single shared node, also across rules parsed by the same parser,
+    and constant branches are simplified away. Parsing is iterative and linear in the length of the text.
+    """
+
+    _TOKEN = re.compile(r"\s*(?:([()])|([A-Za-z_]\w*)|(\S))")
+    _PRECEDENCE = {"or": 1, "and": 2, "not": 3}
+
+    def __init__(self) -> None:
+        self._true = BooleanLiteral(True)
+        self._false = BooleanLiteral(False)
+        self._variables: dict[str, Variable] = {}
+        # Interned non-terminals, keyed by their operator and the identities of their (interned) operands
+        self._nodes: dict[tuple[str, int, int], Expression] = {}
+
+    @property
+    def variables(self) -> dict[str, Variable]:
+        return self._variables
+
+    @property
+    def n_nodes(self) -> int:
+        return 2 + len(self._variables) + len(self._nodes)
+
+    def parse(self, text: str) -> Expression:
+        operands: list[Expression] = []
+        operators: list[str] = []
+        is_operand_expected = True
+        for match in self._TOKEN.finditer(text):
+            token = match.group(match.lastindex)
+            if match.lastindex == 3:
+                raise ValueError(f"Unexpected character {token!r} at position {match.start(3)}")
+            if is_operand_expected:
+                if token in ("(", "not"):
+                    operators.append(token)
+                elif token in (")", "and", "or"):
+                    raise ValueError(f"Expected an operand, got {token!r} at position {match.start(match.lastindex)}")
+                else:
+                    operands.append(self._terminal(token))
+                    is_operand_expected = False
+            elif token in ("and", "or"):
+                while operators and operators[-1] != "(" and self._PRECEDENCE[operators[-1]] >= self._PRECEDENCE[token]:
+                    self._reduce(operators.pop(), operands)
+                operators.append(token)
+                is_operand_expected = True
+            elif token == ")":
+                while operators and operators[-1] != "(":
+                    self._reduce(operators.pop(), operands)
+                if not operators:
+                    raise ValueError(f"Unbalanced ')' at position {match.start(1)}")
+                operators.pop()
+            else:
+                raise ValueError(f"Expected an operator, got {token!r} at position {match.start(match.lastindex)}")
+
+        if is_operand_expected:
+            raise ValueError("Unexpected end of rule")
+        while operators:
+            operator = operators.pop()
+            if operator == "(":
+                raise ValueError("Unbalanced '('")
+            self._reduce(operator, operands)
+        return operands.pop()
+
+    def _terminal(self, name: str) -> Expression:
+        if name == "true":
+            return self._true
+        if name == "false":
+            return self._false
+        if name not in self._variables:
+            self._variables[name] = Variable(name)
+        return self._variables[name]
+
+    def _reduce(self, operator: str, operands: list[Expression]) -> None:
+        if operator == "not":
+            operands.append(self._not(operands.pop()))
+        else:
+            right = operands.pop()
+            left = operands.pop()
+            operands.append(self._and(left, right) if operator == "and" else self._or(left, right))
+
+    # Since parsed terminals have no side effects, operands can be dropped without changing the outcome.
+    def _and(self, left: Expression, right: Expression) -> Expression:
+        if left is self._false or right is self._false:
+            return self._false
+        if left is self._true or left is right:
+            return right
+        if right is self._true:
+            return left
+        return self._intern(("and", id(left), id(right)), lambda: AndExpression(left, right))
+
+    def _or(self, left: Expression, right: Expression) -> Expression:
+        if left is self._true or right is self._true:
+            return self._true
+        if left is self._false or left is right:
+            return right
+        if right is self._false:
+            return left
+        return self._intern(("or", id(left), id(right)), lambda: OrExpression(left, right))
+
+    def _not(self, operand: Expression) -> Expression:
+        if operand is self._true:
+            return self._false
+        if operand is self._false:
+            return self._true
+        if type(operand) is NotExpression:
+            return operand._operand
+        return self._intern(("not", id(operand), id(operand)), lambda: NotExpression(operand))
+
+    def _intern(self, key: tuple[str, int, int], create: Callable[[], Expression]) -> Expression:
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = create()
+        return node
+
+
+def benchmark_compiled(depth: int = 10, number: int = 1_000) -> None:
+    """Compare tree-walking interpretation against the compiled evaluator."""
+    # Variables, unlike literals, cannot be folded away by the compiler
+    nodes: list[Expression] = [Variable(f"flag_{i}", random.random() < 0.5) for i in range(2**depth)]
+    while len(nodes) > 1:
+        operators = random.choices([AndExpression, OrExpression], k=len(nodes) // 2)
+        nodes = [operator(left, right) for operator, left, right in zip(operators, nodes[::2], nodes[1::2])]
+    expression = nodes[0]
+    compiled = compile_expression(expression)
+    assert compiled.interpret() == expression.interpret()
+
+    time_interpreted = timeit.timeit(expression.interpret, number=number)
+    time_compiled = timeit.timeit(compiled.interpret, number=number)
+    print(f"Interpreted: {time_interpreted:.4f}s, compiled: {time_compiled:.4f}s for {number} evaluations")
+
+
+def benchmark_batch(n_rows: int = 100_000) -> None:
+    """Compare a per-row `interpret()` loop against the batch evaluator."""
+    a, b, c = Variable("a"), Variable("b"), Variable("c")
+    expression = OrExpression(AndExpression(a, b), AndExpression(c, OrExpression(a, BooleanLiteral(False))))
+    rng = np.random.default_rng()
+    columns = {name: rng.random(n_rows) < 0.5 for name in ["a", "b", "c"]}
+
+    def interpret_rows() -> list[bool]:
+        results = []
+        for a.value, b.value, c.value in zip(*(columns[name].tolist() for name in ["a", "b", "c"])):
+            results.append(expression.interpret())
+        return results
+
+    assert interpret_rows() == evaluate_batch(expression, columns).tolist()
+    time_rows = timeit.timeit(interpret_rows, number=1)
+    time_batch = timeit.timeit(lambda: evaluate_batch(expression, columns), number=1)
+    print(f"Per-row loop: {time_rows:.4f}s, batch: {time_batch:.4f}s for {n_rows} records")
+
+
+def benchmark_incremental(depth: int = 14, number: int = 100) -> None:
+    """Compare full re-evaluation against incremental re-evaluation, when a single variable changes."""
+    variables = [Variable(f"flag_{i}", random.random() < 0.5) for i in range(2**depth)]
+    nodes: list[Expression] = list(variables)
+    while len(nodes) > 1:
+        operators = random.choices([AndExpression, OrExpression], k=len(nodes) // 2)
+        nodes = [operator(left, right) for operator, left, right in zip(operators, nodes[::2], nodes[1::2])]
+    expression = nodes[0]
+    incremental = IncrementalExpression(expression)
+
+    def change_and_interpret() -> bool:
+        variable = random.choice(variables)
+        incremental.set_value(variable.name, not variable.value)
+        return incremental.interpret()
+
+    assert change_and_interpret() == expression.interpret()
+    time_full = timeit.timeit(expression.interpret, number=number)
+    time_incremental = timeit.timeit(change_and_interpret, number=number)
+    print(f"Full: {time_full:.4f}s, incremental: {time_incremental:.4f}s for {number} single-variable changes")
+
+
+def benchmark_parser(n_rules: int = 5_000) -> None:
+    """Parse generated rules that repeat the same subexpressions many times."""
+    names = [f"flag_{i}" for i in range(20)]
+    clauses = [f"({a} and not {b})" for a, b in zip(names, reversed(names))]
+
+    def generate_rule() -> str:
+        rule = " or ".join(random.sample(clauses, k=4))
+        return f"{rule} and ({random.choice(names)} or false)"
+
+    for n in (n_rules, 2 * n_rules):
+        rules = [generate_rule() for _ in range(n)]
+        parser = Parser()
+        time_parse = timeit.timeit(lambda: [parser.parse(rule) for rule in rules], number=1)
+        n_tokens = sum(len(Parser._TOKEN.findall(rule)) for rule in rules)
+        print(f"Parsed {n} rules ({n_tokens} tokens) in {time_parse:.4f}s, into {parser.n_nodes} shared nodes")
+
+
 if __name__ == "__main__":
     expression = OrExpression(
         AndExpression(
@@ -48,3 +439,22 @@ if __name__ == "__main__":
     )
 
     print(expression.interpret())
+    print(compile_expression(expression).interpret())
+
+    flag = Variable("flag")
+    expression = AndExpression(flag, OrExpression(Variable("other"), BooleanLiteral(True)))
+    print(evaluate_batch(expression, {"flag": np.array([True, False, True]), "other": np.array([False] * 3)}))
+
+    parser = Parser()
+    rule = parser.parse("(flag and not other) or (flag and not other and true) or false")
+    parser.variables["flag"].value = True
+    print(rule.interpret(), f"with {parser.n_nodes} nodes")
+
+    incremental = IncrementalExpression(rule)
+    incremental.set_value("other", True)
+    print(incremental.interpret())
+
+    benchmark_compiled()
+    benchmark_batch()
+    benchmark_incremental()
+    benchmark_parser()
@@ -3,6 +3,10 @@
 from __future__ import annotations
 
 import abc
+import asyncio
+import multiprocessing
+import time
+from typing import Any, Literal
 
 
 class Mediator(abc.ABC):
@@ -26,6 +30,166 @@ class ChatRoom(Mediator):
                 user.receive(message, receiver)
 
 
+class AsyncChatRoom(Mediator):
+    """Deliver messages through a bounded inbox per user, served by an asyncio task.
+
+    When an inbox is full, the overflow policy either drops the oldest or the newest message, or blocks the sender
+    until there is space. Blocking is only possible when publishing with `await publish()`, since `send_message()`
+    must return without waiting. Messages that users fail to receive are counted, and do not stop the delivery.
+    """
+
+    def __init__(
+        self,
+        inbox_size: int = 100,
+        overflow: Literal["block", "drop_oldest", "drop_newest"] = "drop_oldest",
+    ) -> None:
+        self._inbox_size = inbox_size
+        self._overflow = overflow
+        self._inboxes: list[tuple[User, asyncio.Queue[tuple[str, User]]]] = []
+        self._tasks: list[asyncio.Task[None]] = []
+        self._is_started = False
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def register(self, user: User) -> None:
+        inbox: asyncio.Queue[tuple[str, User]] = asyncio.Queue(self._inbox_size)
+        self._inboxes.append((user, inbox))
+        if self._is_started:
+            self._tasks.append(asyncio.create_task(self._deliver(user, inbox)))
+
+    def send_message(self, message: str, sender: User) -> None:
+        """Send without waiting, dropping messages from full inboxes."""
+        if self._overflow == "block":
+            raise ValueError("Sending must wait for space in full inboxes, with `await publish()`")
+        for user, inbox in self._inboxes:
+            if user is not sender:
+                self._put_nowait(inbox, (message, sender))
+
+    async def publish(self, message: str, sender: User) -> None:
+        for user, inbox in self._inboxes:
+            if user is not sender:
+                if self._overflow == "block":
+                    await inbox.put((message, sender))
+                else:
+                    self._put_nowait(inbox, (message, sender))
+
+    async def start(self) -> None:
+        self._is_started = True
+        self._tasks = [asyncio.create_task(self._deliver(user, inbox)) for user, inbox in self._inboxes]
+
+    async def join(self) -> None:
+        """Wait until all messages sent so far have been delivered."""
+        for _, inbox in self._inboxes:
+            await inbox.join()
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._is_started = False
+
+    def _put_nowait(self, inbox: asyncio.Queue[tuple[str, User]], item: tuple[str, User]) -> None:
+        if inbox.full():
+            self.dropped += 1
+            if self._overflow == "drop_newest":
+                return
+            inbox.get_nowait()
+            inbox.task_done()
+        inbox.put_nowait(item)
+
+    async def _deliver(self, user: User, inbox: asyncio.Queue[tuple[str, User]]) -> None:
+        while True:
+            message, sender = await inbox.get()
+            try:
+                user.receive(message, sender)
+                self.delivered += 1
+            except Exception:
+                self.failed += 1
+            finally:
+                inbox.task_done()
+
+
+class ShardedChatRoom(Mediator):
+    """Spread the users of a chat room across worker processes, to fan out messages on several cores.
+
+    The room acts as a local broker: messages are collected in batches, and each batch is sent over a queue to every
+    worker, which delivers it to its own users. Users are copied to the workers when they register.
+    """
+
+    def __init__(self, n_workers: int = 2, batch_size: int = 64) -> None:
+        self._batch_size = batch_size
+        self._batch: list[tuple[str, int, User]] = []
+        self._keys: dict[int, int] = {}
+        self._users: list[User] = []
+        self._acknowledgements: multiprocessing.Queue[int] = multiprocessing.Queue()
+        self._inboxes: list[multiprocessing.Queue[tuple[str, Any]]] = []
+        self._workers: list[multiprocessing.Process] = []
+        for _ in range(n_workers):
+            inbox: multiprocessing.Queue[tuple[str, Any]] = multiprocessing.Queue()
+            worker = multiprocessing.Process(target=_serve_shard, args=(inbox, self._acknowledgements), daemon=True)
+            worker.start()
+            self._inboxes.append(inbox)
+            self._workers.append(worker)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Copies of the users only receive messages, so they do not need the room itself.
+        return {}
+
+    def register(self, user: User) -> None:
+        key = len(self._users)
+        self._keys[id(user)] = key
+        self._users.append(user)
+        self._inboxes[key % len(self._inboxes)].put(("register", (key, user)))
+
+    def send_message(self, message: str, sender: User) -> None:
+        self._batch.append((message, self._keys[id(sender)], sender))
+        if len(self._batch) >= self._batch_size:
+            self._send_batch()
+
+    def flush(self) -> int:
+        """Wait until all messages sent so far have been delivered, and return the number of deliveries."""
+        self._send_batch()
+        for inbox in self._inboxes:
+            inbox.put(("flush", None))
+        return sum(self._acknowledgements.get() for _ in self._inboxes)
+
+    def close(self) -> None:
+        self._send_batch()
+        for inbox in self._inboxes:
+            inbox.put(("stop", None))
+        for worker in self._workers:
+            worker.join()
+
+    def _send_batch(self) -> None:
+        if self._batch:
+            for inbox in self._inboxes:
+                inbox.put(("messages", self._batch))
+            self._batch = []
+
+
+def _serve_shard(inbox: multiprocessing.Queue[tuple[str, Any]], acknowledgements: multiprocessing.Queue[int]) -> None:
+    users: dict[int, User] = {}
+    delivered = 0
+    while True:
+        command, payload = inbox.get()
+        if command == "register":
+            key, user = payload
+            users[key] = user
+        elif command == "messages":
+            for message, sender_key, sender in payload:
+                for key, user in users.items():
+                    if key != sender_key:
+                        user.receive(message, sender)
+                        delivered += 1
+        elif command == "flush":
+            acknowledgements.put(delivered)
+            delivered = 0
+        elif command == "stop":
+            return
+
+
 class User:
     def __init__(self, name: str, mediator: Mediator) -> None:
         self._name = name
@@ -45,6 +209,58 @@ class User:
         print(f"{self} receives from {sender}: {message}")
 
 
+class SilentUser(User):
+    def receive(self, message: str, sender: User) -> None:
+        pass
+
+
+async def benchmark(n_users: int = 10_000, n_messages: int = 20) -> None:
+    """Measure the broadcast throughput of the asynchronous chat room."""
+    chatroom = AsyncChatRoom(inbox_size=n_messages, overflow="block")
+    users = [SilentUser(f"user-{i}", chatroom) for i in range(n_users)]
+    await chatroom.start()
+    start = time.perf_counter()
+    for i in range(n_messages):
+        await chatroom.publish(f"message-{i}", users[i % n_users])
+    await chatroom.join()
+    duration = time.perf_counter() - start
+    await chatroom.close()
+    print(f"{n_users} users: {n_messages / duration:.1f} messages/s, {chatroom.delivered / duration:.0f} deliveries/s")
+
+
+def benchmark_sharded(n_users: int = 20_000, n_messages: int = 200) -> None:
+    """Measure how fan-out throughput scales with the number of worker processes."""
+    for n_workers in (1, 2, 4, 8):
+        chatroom = ShardedChatRoom(n_workers)
+        users = [SilentUser(f"user-{i}", chatroom) for i in range(n_users)]
+        chatroom.flush()
+        start = time.perf_counter()
+        for i in range(n_messages):
+            users[i % n_users].send(f"message-{i}")
+        delivered = chatroom.flush()
+        duration = time.perf_counter() - start
+        chatroom.close()
+        print(
+            f"{n_workers} workers, {n_users} users: {n_messages / duration:.1f} messages/s, "
+            f"{delivered / duration:.0f} deliveries/s"
+        )
+
+
+async def main() -> None:
+    chatroom = AsyncChatRoom(inbox_size=1, overflow="drop_oldest")
+    user_1 = User("user-1", chatroom)
+    User("user-2", chatroom)
+    await chatroom.start()
+
+    user_1.send("Hello everyone!")
+    user_1.send("Hello again!")
+    await chatroom.join()
+    await chatroom.close()
+    print(f"Delivered: {chatroom.delivered}, dropped: {chatroom.dropped}")
+
+    await benchmark()
+
+
 if __name__ == "__main__":
     chatroom = ChatRoom()
 
@@ -53,3 +269,16 @@ if __name__ == "__main__":
     user_3 = User("user-3", chatroom)
 
     user_1.send("Hello everyone!")
+
+    asyncio.run(main())
+
+    chatroom = ShardedChatRoom(n_workers=2)
+    user_1 = User("user-1", chatroom)
+    user_2 = User("user-2", chatroom)
+    user_3 = User("user-3", chatroom)
+
+    user_1.send("Hello from another process!")
+    chatroom.flush()
+    chatroom.close()
+
+    benchmark_sharded()
@@ -2,32 +2,162 @@
 
 from __future__ import annotations
 
+import random
+import time
+
+# Leaves of ropes are merged while they are shorter than this
+_LEAF_SIZE = 1024
+
+
+class Rope:
+    """Immutable, balanced binary tree of text fragments.
+
+    Ropes are never modified, but share their subtrees when they are joined or split, so that a memento can keep a
+    rope as it is, without copying any text.
+    """
+
+    __slots__ = ("left", "right", "text", "length", "height")
+
+    def __init__(self, left: Rope | None, right: Rope | None, text: str | None) -> None:
+        self.left = left
+        self.right = right
+        self.text = text
+        if text is not None:
+            self.length = len(text)
+            self.height = 0
+        else:
+            self.length = left.length + right.length
+            self.height = 1 + max(left.height, right.height)
+
+    def __str__(self) -> str:
+        fragments = []
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if node.text is not None:
+                fragments.append(node.text)
+            else:
+                stack.append(node.right)
+                stack.append(node.left)
+        return "".join(fragments)
+
+
+def _leaf(text: str) -> Rope | None:
+    return Rope(None, None, text) if text else None
+
+
+def _join(left: Rope | None, right: Rope | None) -> Rope | None:
+    """Concatenate two ropes, keeping the heights of sibling subtrees within one of each other."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.height > right.height + 1:
+        joined = _join(left.right, right)
+        return _rebalance(left.left, joined)
+    if right.height > left.height + 1:
+        joined = _join(left, right.left)
+        return _rebalance(joined, right.right)
+    if left.text is not None and right.text is not None and left.length + right.length <= _LEAF_SIZE:
+        return Rope(None, None, left.text + right.text)
+    return Rope(left, right, None)
+
+
+def _rebalance(left: Rope, right: Rope) -> Rope:
+    if left.height > right.height + 1:
+        if left.left.height >= left.right.height:
+            return Rope(left.left, Rope(left.right, right, None), None)
+        middle = left.right
+        return Rope(Rope(left.left, middle.left, None), Rope(middle.right, right, None), None)
+    if right.height > left.height + 1:
+        if right.right.height >= right.left.height:
+            return Rope(Rope(left, right.left, None), right.right, None)
+        middle = right.left
+        return Rope(Rope(left, middle.left, None), Rope(middle.right, right.right, None), None)
+    return Rope(left, right, None)
+
+
+def _split(rope: Rope | None, position: int) -> tuple[Rope | None, Rope | None]:
+    if rope is None:
+        return None, None
+    if rope.text is not None:
+        return _leaf(rope.text[:position]), _leaf(rope.text[position:])
+    if position <= rope.left.length:
+        left, right = _split(rope.left, position)
+        return left, _join(right, rope.right)
+    left, right = _split(rope.right, position - rope.left.length)
+    return _join(rope.left, left), right
+
 
 # Originator
 class TextEditor:
+    """Editor backed by a rope, where writes and inserts take logarithmic time.
+
+    Small writes are buffered, and added to the rope together. The text is only materialized by `get_text()`.
+    """
+
     def __init__(self) -> None:
-        self._text = ""
+        self._rope: Rope | None = None
+        self._pending: list[str] = []
+        self._n_pending = 0
+        self._text: str | None = ""
 
     def write(self, new_text: str) -> None:
-        self._text += new_text
+        self._pending.append(new_text)
+        self._n_pending += len(new_text)
+        self._text = None
+        if self._n_pending >= _LEAF_SIZE:
+            self._flush()
+
+    def insert(self, position: int, new_text: str) -> None:
+        self._flush()
+        left, right = _split(self._rope, position)
+        self._rope = _join(_join(left, _leaf(new_text)), right)
+        self._text = None
 
     def get_text(self) -> str:
+        if self._text is None:
+            self._flush()
+            self._text = str(self._rope) if self._rope is not None else ""
         return self._text
 
     def save(self) -> TextMemento:
-        return TextMemento(self._text)
+        self._flush()
+        return TextMemento(self._rope)
 
     def restore(self, memento: TextMemento) -> str:
-        self._text = memento.get_saved_text()
+        self._pending = []
+        self._n_pending = 0
+        self._rope = memento._rope
+        self._text = None
+
+    def _flush(self) -> None:
+        if self._pending:
+            self._rope = _join(self._rope, _leaf("".join(self._pending)))
+            self._pending = []
+            self._n_pending = 0
+
+
+class StringTextEditor:
+    """Editor backed by a plain string, which is copied on every write."""
+
+    def __init__(self) -> None:
+        self._text = ""
+
+    def write(self, new_text: str) -> None:
+        self._text += new_text
+
+    def get_text(self) -> str:
+        return self._text
 
 
 # Memento
 class TextMemento:
-    def __init__(self, text: str) -> None:
-        self._text = text
+    def __init__(self, rope: Rope | None) -> None:
+        self._rope = rope
 
     def get_saved_text(self) -> str:
-        return self._text
+        return str(self._rope) if self._rope is not None else ""
 
 
 # Caretaker
@@ -42,6 +172,18 @@ class History:
         return self._undo_stack.pop()
 
 
+def benchmark(n_writes: int = 1_000_000) -> None:
+    """Compare many small writes to the rope-backed editor, and to the string-backed one (with fewer writes)."""
+    words = [random.choice(["lorem ", "ipsum ", "dolor ", "sit ", "amet "]) for _ in range(n_writes)]
+    for editor, n in [(TextEditor(), n_writes), (StringTextEditor(), n_writes // 10)]:
+        start = time.perf_counter()
+        for word in words[:n]:
+            editor.write(word)
+        text = editor.get_text()
+        duration = time.perf_counter() - start
+        print(f"{type(editor).__name__}: {n} writes, {len(text)} characters in {duration:.3f}s")
+
+
 if __name__ == "__main__":
     editor = TextEditor()
     history = History()
@@ -57,3 +199,9 @@ if __name__ == "__main__":
     print("Undo 1:", editor.get_text())
     editor.restore(history.undo())
     print("Undo 2:", editor.get_text())
+
+    editor.write("Hello world!")
+    editor.insert(5, ",")
+    print("Inserted:", editor.get_text())
+
+    benchmark()
@@ -3,29 +3,46 @@
 from __future__ import annotations
 
 import abc
+import heapq
+import threading
+import time
+import weakref
 
 
 class Subject(abc.ABC):
-    def __init__(self) -> None:
-        self._observers: list[Observer] = []
-
-    def attach(self, observer: Observer) -> None:
-        if observer not in self._observers:
-            self._observers.append(observer)
-
-    def detach(self, observer: Observer) -> None:
-        if observer in self._observers:
-            self._observers.remove(observer)
-
-    def notify(self, modifier: Observer | None = None) -> None:
-        for observer in self._observers:
+    def __init__(self, delivery: AsyncDelivery | None = None) -> None:
+        # Observers are held by weak reference, per topic, where `None` stands for all topics.
+        # Dictionaries allow attaching and detaching in constant time, and preserve the attachment order.
+        self._observers: dict[str | None, weakref.WeakKeyDictionary[Observer, None]] = {}
+        self._delivery = delivery
+
+    def attach(self, observer: Observer, topic: str | None = None) -> None:
+        self._observers.setdefault(topic, weakref.WeakKeyDictionary())[observer] = None
+
+    def detach(self, observer: Observer, topic: str | None = None) -> None:
+        """Detach an observer from a topic, or from all topics if none is given."""
+        topics = list(self._observers) if topic is None else [topic]
+        for attached_topic in topics:
+            if attached_topic in self._observers:
+                self._observers[attached_topic].pop(observer, None)
+
+    def notify(self, modifier: Observer | None = None, topic: str | None = None) -> None:
+        all_topics_observers = self._observers.get(None, {})
+        observers = list(all_topics_observers.keys())
+        if topic is not None and topic in self._observers:
+            topic_observers = self._observers[topic].keys()
+            observers += [observer for observer in topic_observers if observer not in all_topics_observers]
+        for observer in observers:
             if modifier != observer:
-                observer.update(self)
+                if self._delivery is None:
+                    observer.update(self)
+                else:
+                    self._delivery.submit(self, observer)
 
 
 class Core(Subject):
-    def __init__(self, name: str = "") -> None:
-        super().__init__()
+    def __init__(self, name: str = "", delivery: AsyncDelivery | None = None) -> None:
+        super().__init__(delivery)
         self._name = name
         self._temperature = 0.0
 
@@ -40,7 +57,7 @@ class Core(Subject):
     @temperature.setter
     def temperature(self, temperature: float) -> None:
         self._temperature = temperature
-        self.notify()
+        self.notify(topic="temperature")
 
 
 class Observer(abc.ABC):
@@ -53,6 +70,138 @@ class TemperatureViewer(Observer):
         print(f"Temperature viewer: {subject.name} has temperature {subject.temperature}")
 
 
+def benchmark(n_observers: int = 100_000) -> None:
+    """Time attaching, notifying and detaching many observers."""
+
+    class NullObserver(Observer):
+        def update(self, subject: Subject) -> None:
+            pass
+
+    observers = [NullObserver() for _ in range(n_observers)]
+    core = Core()
+    start = time.perf_counter()
+    for observer in observers:
+        core.attach(observer, topic="temperature")
+    time_attach = time.perf_counter() - start
+    start = time.perf_counter()
+    core.temperature = 1.0
+    time_notify = time.perf_counter() - start
+    start = time.perf_counter()
+    for observer in observers:
+        core.detach(observer)
+    time_detach = time.perf_counter() - start
+    print(f"{n_observers} observers: attach {time_attach:.3f}s, notify {time_notify:.3f}s, detach {time_detach:.3f}s")
+
+    # The previous list-based registry, with only a tenth of the observers
+    registry: list[Observer] = []
+    start = time.perf_counter()
+    for observer in observers[: n_observers // 10]:
+        if observer not in registry:
+            registry.append(observer)
+    print(f"{n_observers // 10} observers: attach {time.perf_counter() - start:.3f}s with a list-based registry")
+
+
+class Mailbox:
+    """Latest pending notification of each subject, for a single observer, held by weak reference."""
+
+    def __init__(self, observer: Observer) -> None:
+        self.observer = weakref.ref(observer)
+        self.pending: dict[int, Subject] = {}
+        # Whether the mailbox is waiting for, or being served by, a worker of the delivery
+        self.is_scheduled = False
+        self.next_delivery = 0.0
+
+
+class AsyncDelivery:
+    """Deliver notifications in the background, coalescing rapid changes into the latest one.
+
+    Each observer has its own mailbox, and mailboxes with pending notifications are served by a bounded pool of
+    worker threads, at most once per `interval` each. A slow observer stalls neither the producer nor the other
+    observers, as long as there are fewer slow observers than workers. Notifications that observers fail to handle
+    are counted, and do not stop the delivery.
+    """
+
+    def __init__(self, interval: float = 0.0, max_workers: int = 4) -> None:
+        self._interval = interval
+        self._condition = threading.Condition()
+        # Mailboxes are dropped along with their observers, and skipped if they were already scheduled
+        self._mailboxes: weakref.WeakKeyDictionary[Observer, Mailbox] = weakref.WeakKeyDictionary()
+        # Mailboxes to serve, by time of their next delivery
+        self._scheduled: list[tuple[float, int, Mailbox]] = []
+        self._n_scheduled = 0
+        self._is_closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self._workers = [threading.Thread(target=self._run, daemon=True) for _ in range(max_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, subject: Subject, observer: Observer) -> None:
+        with self._condition:
+            mailbox = self._mailboxes.get(observer)
+            if mailbox is None:
+                mailbox = self._mailboxes[observer] = Mailbox(observer)
+            if id(subject) in mailbox.pending:
+                # Coalesce with the pending notification, since the observer reads the latest state anyway
+                self.dropped += 1
+            mailbox.pending[id(subject)] = subject
+            if not mailbox.is_scheduled:
+                self._schedule(mailbox)
+
+    def close(self) -> None:
+        """Deliver the pending notifications, and stop the workers."""
+        with self._condition:
+            self._is_closed = True
+            self._condition.notify_all()
+        for worker in self._workers:
+            worker.join()
+
+    def _schedule(self, mailbox: Mailbox) -> None:
+        mailbox.is_scheduled = True
+        self._n_scheduled += 1
+        heapq.heappush(self._scheduled, (mailbox.next_delivery, self._n_scheduled, mailbox))
+        self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                while True:
+                    if self._scheduled:
+                        # Once closed, pending notifications are delivered without waiting
+                        delay = 0.0 if self._is_closed else self._scheduled[0][0] - time.monotonic()
+                        if delay <= 0:
+                            break
+                        self._condition.wait(delay)
+                    elif self._is_closed:
+                        return
+                    else:
+                        self._condition.wait()
+                _, _, mailbox = heapq.heappop(self._scheduled)
+                subjects = list(mailbox.pending.values())
+                mailbox.pending.clear()
+            observer = mailbox.observer()
+            if observer is None:
+                continue
+            n_delivered = n_failed = 0
+            try:
+                for subject in subjects:
+                    try:
+                        observer.update(subject)
+                        n_delivered += 1
+                    except Exception:
+                        n_failed += 1
+            finally:
+                del observer
+                with self._condition:
+                    self.delivered += n_delivered
+                    self.failed += n_failed
+                    mailbox.next_delivery = time.monotonic() + self._interval
+                    mailbox.is_scheduled = False
+                    if mailbox.pending:
+                        self._schedule(mailbox)
+
+
 if __name__ == "__main__":
     core_1 = Core("core-1")
     core_2 = Core("core-2")
@@ -65,3 +214,25 @@ if __name__ == "__main__":
 
     core_1.temperature = 80.0
     core_1.temperature = 90.0
+
+    # Observers of other topics are not notified, and observers that are no longer used are dropped
+    viewer_3 = TemperatureViewer()
+    core_2.attach(viewer_3)
+    load_viewer = TemperatureViewer()
+    core_2.attach(load_viewer, topic="load")
+    core_2.temperature = 70.0
+    del viewer_3
+    core_2.temperature = 75.0
+
+    # A fast sensor, whose changes are coalesced and delivered in the background
+    delivery = AsyncDelivery(interval=0.01)
+    sensor = Core("sensor", delivery)
+    sensor.attach(viewer_1)
+    start = time.perf_counter()
+    for temperature in range(10_000):
+        sensor.temperature = float(temperature)
+    print(f"Produced 10000 changes in {time.perf_counter() - start:.3f}s")
+    delivery.close()
+    print(f"Delivered: {delivery.delivered}, dropped: {delivery.dropped}")
+
+    benchmark()
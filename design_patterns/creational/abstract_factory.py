@@ -8,6 +8,35 @@ Problem:
 from __future__ import annotations
 
 import abc
+import gc
+import time
+from typing import Callable, Generic, Iterable, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class ObjectPool(Generic[T]):
+    """Recycle released instances, rather than creating new ones."""
+
+    def __init__(self, create: Callable[[], T], max_size: int = 10_000) -> None:
+        self._create = create
+        self._max_size = max_size
+        self._free: list[T] = []
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self, n: int) -> list[T]:
+        n_reused = min(n, len(self._free))
+        objects = self._free[len(self._free) - n_reused :]
+        del self._free[len(self._free) - n_reused :]
+        objects.extend(self._create() for _ in range(n - n_reused))
+        self.reused += n_reused
+        self.created += n - n_reused
+        return objects
+
+    def release(self, objects: Iterable[T]) -> None:
+        self._free.extend(objects)
+        del self._free[self._max_size :]
 
 
 # Abstract classes
@@ -15,8 +44,21 @@ class PetFactory(abc.ABC):
     """Abstract factory pattern.
 
     It is responsible for creating both a pet and its suitable food.
+    Families can also be created in batches, from pools of released products. Released products are reused as they
+    are, so they should not keep any state specific to their previous user.
     """
 
+    def __init__(self) -> None:
+        self._pets = ObjectPool(self.get_pet)
+        self._foods = ObjectPool(self.get_food)
+
+    def get_families(self, n: int) -> list[tuple[Pet, PetFood]]:
+        return list(zip(self._pets.acquire(n), self._foods.acquire(n)))
+
+    def release_families(self, families: Sequence[tuple[Pet, PetFood]]) -> None:
+        self._pets.release(pet for pet, _ in families)
+        self._foods.release(food for _, food in families)
+
     @abc.abstractmethod
     def get_pet(self) -> Pet: ...
 
@@ -69,7 +111,37 @@ class PetStore:
         print(f'Its food is "{food}"')
 
 
+def benchmark(n_requests: int = 1_000, n_families: int = 1_000) -> None:
+    """Compare allocations of one-by-one families against pooled batches of families."""
+    factory = DogFactory()
+
+    def create_one_by_one() -> None:
+        for _ in range(n_requests):
+            families = [(factory.get_pet(), factory.get_food()) for _ in range(n_families)]
+            del families
+
+    def create_pooled() -> None:
+        for _ in range(n_requests):
+            families = factory.get_families(n_families)
+            factory.release_families(families)
+
+    for label, create in [("One by one", create_one_by_one), ("Pooled", create_pooled)]:
+        n_collections = sum(generation["collections"] for generation in gc.get_stats())
+        start = time.perf_counter()
+        create()
+        duration = time.perf_counter() - start
+        n_collections = sum(generation["collections"] for generation in gc.get_stats()) - n_collections
+        print(f"{label}: {n_requests * n_families} families in {duration:.3f}s, {n_collections} garbage collections")
+    print(f"Pooled products created: {factory._pets.created + factory._foods.created}")
+
+
 if __name__ == "__main__":
     factory = DogFactory()
     store = PetStore(factory)
     store.show_pet()
+
+    families = factory.get_families(3)
+    print(*(f"{pet} eats {food}" for pet, food in families), sep="\n")
+    factory.release_families(families)
+
+    benchmark()
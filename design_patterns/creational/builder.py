@@ -9,6 +9,11 @@ It partitions the process of building an object into 4 roles:
 
 from __future__ import annotations
 
+import time
+import tracemalloc
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Sequence
+
 
 class Director:
     """High-level orchestrator."""
@@ -18,27 +23,104 @@ class Director:
 
     def construct_car(self) -> None:
         self._builder.create_new_car()
+        self._build_parts()
+
+    def get_car(self) -> Car:
+        return self._builder.car
+
+    def _build_parts(self) -> None:
         self._builder.add_model()
         self._builder.add_tires()
         self._builder.add_engine()
 
-    def get_car(self) -> Car:
+
+class BulkDirector(Director):
+    """Run each building step once, across a whole batch of cars."""
+
+    def construct_cars(self, n: int) -> None:
+        self._builder.create_new_cars(n)
+        self._build_parts()
+
+    def get_cars(self) -> CarBatch:
         return self._builder.car
 
 
+class ConcurrentDirector(Director):
+    """Run the building steps in a thread pool, as soon as the steps they depend on are done.
+
+    The construction then lasts as long as the critical path of the steps, rather than the sum of all of them.
+    """
+
+    def __init__(self, builder: ConcreteBuilder, max_workers: int = 8) -> None:
+        super().__init__(builder)
+        self._max_workers = max_workers
+        self.step_durations: dict[str, float] = {}
+
+    def critical_path(self) -> tuple[list[str], float]:
+        """Find the chain of dependent steps that took the longest, during the last construction."""
+        dependencies = self._builder.step_dependencies
+        durations: dict[str, float] = {}
+        predecessors: dict[str, str | None] = {}
+        # Steps are recorded in the order they were completed, so dependencies always come first
+        for step, duration in self.step_durations.items():
+            predecessor = max(dependencies[step], key=durations.__getitem__, default=None)
+            predecessors[step] = predecessor
+            durations[step] = duration + (durations[predecessor] if predecessor is not None else 0.0)
+
+        step = max(durations, key=durations.__getitem__, default=None)
+        total = durations.get(step, 0.0)
+        path = []
+        while step is not None:
+            path.append(step)
+            step = predecessors[step]
+        return path[::-1], total
+
+    def _build_parts(self) -> None:
+        remaining = dict(self._builder.step_dependencies)
+        done: set[str] = set()
+        running: dict[Future[float], str] = {}
+        self.step_durations = {}
+        with ThreadPoolExecutor(self._max_workers) as executor:
+            while remaining or running:
+                for step, dependencies in list(remaining.items()):
+                    if done.issuperset(dependencies):
+                        del remaining[step]
+                        running[executor.submit(self._run_step, step)] = step
+                if not running:
+                    raise ValueError(f"Steps with circular dependencies: {', '.join(remaining)}")
+                completed, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in completed:
+                    step = running.pop(future)
+                    self.step_durations[step] = future.result()
+                    done.add(step)
+
+    def _run_step(self, step: str) -> float:
+        start = time.perf_counter()
+        getattr(self._builder, step)()
+        return time.perf_counter() - start
+
+
 class AbstractBuilder:
     """Create empty object."""
 
+    # Building steps, along with the steps that must be done before each of them
+    step_dependencies: dict[str, tuple[str, ...]] = {}
+
     def __init__(self) -> None:
-        self.car: Car | None = None
+        self.car: Car | CarBatch | None = None
 
     def create_new_car(self) -> None:
         self.car = Car()
 
+    def create_new_cars(self, n: int) -> None:
+        self.car = CarBatch(n)
+
 
 class ConcreteBuilder(AbstractBuilder):
     """Build object in parts."""
 
+    step_dependencies = {"add_model": (), "add_tires": (), "add_engine": ()}
+
     def add_model(self) -> None:
         self.car.model = "Skylark"
 
@@ -61,9 +143,113 @@ class Car:
         return f"{self.model} | {self.tires} | {self.engine}"
 
 
+class Column:
+    """Field of a `CarBatch`, stored as a tuple with one value per car.
+
+    Assigning a single value sets it for all cars, while assigning a list or a tuple sets one value per car.
+    """
+
+    def __set_name__(self, owner: type[CarBatch], name: str) -> None:
+        self._attribute = "_" + name
+
+    def __get__(self, batch: CarBatch | None, owner: type[CarBatch]) -> Any:
+        if batch is None:
+            return self
+        return getattr(batch, self._attribute)
+
+    def __set__(self, batch: CarBatch, value: Any) -> None:
+        if isinstance(value, (list, tuple)):
+            if len(value) != len(batch):
+                raise ValueError(f"Expected {len(batch)} values, got {len(value)}")
+            setattr(batch, self._attribute, tuple(value))
+        else:
+            setattr(batch, self._attribute, (value,) * len(batch))
+
+
+class CarBatch:
+    """Columnar batch of products, where single cars are materialized on demand."""
+
+    model: Sequence[str | None] = Column()
+    tires: Sequence[str | None] = Column()
+    engine: Sequence[str | None] = Column()
+
+    def __init__(self, n: int) -> None:
+        self._n = n
+        self.model = None
+        self.tires = None
+        self.engine = None
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __getitem__(self, index: int) -> Car:
+        car = Car()
+        car.model = self.model[index]
+        car.tires = self.tires[index]
+        car.engine = self.engine[index]
+        return car
+
+
+def benchmark(n: int = 1_000_000) -> None:
+    """Compare building cars one by one against building them in bulk."""
+    director = Director(ConcreteBuilder())
+    tracemalloc.start()
+    start = time.perf_counter()
+    cars = []
+    for _ in range(n):
+        director.construct_car()
+        cars.append(director.get_car())
+    duration = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"One by one: {n} cars in {duration:.3f}s, {memory / 2**20:.1f} MiB")
+    del cars
+
+    bulk_director = BulkDirector(ConcreteBuilder())
+    tracemalloc.start()
+    start = time.perf_counter()
+    bulk_director.construct_cars(n)
+    batch = bulk_director.get_cars()
+    duration = time.perf_counter() - start
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"In bulk: {len(batch)} cars in {duration:.3f}s, {memory / 2**20:.1f} MiB")
+
+
+class SlowLookupBuilder(ConcreteBuilder):
+    """Builder whose steps look up their parts slowly, where the engine depends on the model."""
+
+    step_dependencies = {"add_model": (), "add_tires": (), "add_engine": ("add_model",)}
+
+    def add_model(self) -> None:
+        time.sleep(0.2)
+        super().add_model()
+
+    def add_tires(self) -> None:
+        time.sleep(0.3)
+        super().add_tires()
+
+    def add_engine(self) -> None:
+        time.sleep(0.2)
+        super().add_engine()
+
+
 if __name__ == "__main__":
     builder = ConcreteBuilder()
     director = Director(builder)
     director.construct_car()
     car = director.get_car()
     print(car)
+
+    bulk_director = BulkDirector(ConcreteBuilder())
+    bulk_director.construct_cars(3)
+    print(bulk_director.get_cars()[2])
+
+    for director in (Director(SlowLookupBuilder()), ConcurrentDirector(SlowLookupBuilder())):
+        start = time.perf_counter()
+        director.construct_car()
+        print(f"{director.get_car()} built by {type(director).__name__} in {time.perf_counter() - start:.2f}s")
+    steps, duration = director.critical_path()
+    print(f"Critical path: {' -> '.join(steps)} ({duration:.2f}s)")
+
+    benchmark()
@@ -8,7 +8,9 @@ Problem:
 from __future__ import annotations
 
 import abc
-from typing import Literal
+import importlib
+import timeit
+from typing import Any, Callable, Literal
 
 
 class Pet(abc.ABC):
@@ -29,15 +31,85 @@ class Cat(Pet):
         return "Meow!"
 
 
+class PetFactory:
+    """Factory of registered products, which are only created on request.
+
+    Products can be registered by the import path of their class, e.g. "package.module:ClassName", in which case the
+    module is only imported when the product is first requested. Stateless products can be pooled, so that a single
+    instance is reused by all callers.
+    """
+
+    def __init__(self) -> None:
+        self._products: dict[str, Callable[..., Pet] | str] = {}
+        self._arguments: dict[str, dict[str, Any]] = {}
+        self._is_pooled: dict[str, bool] = {}
+        self._pool: dict[str, Pet] = {}
+
+    def register(self, kind: str, product: Callable[..., Pet] | str, *, pooled: bool = False, **kwargs: Any) -> None:
+        self._products[kind] = product
+        self._arguments[kind] = kwargs
+        self._is_pooled[kind] = pooled
+        self._pool.pop(kind, None)
+
+    def unregister(self, kind: str) -> None:
+        del self._products[kind], self._arguments[kind], self._is_pooled[kind]
+        self._pool.pop(kind, None)
+
+    def create(self, kind: str) -> Pet:
+        pet = self._pool.get(kind)
+        if pet is not None:
+            return pet
+
+        product = self._products[kind]
+        if isinstance(product, str):
+            module_name, _, class_name = product.partition(":")
+            product = self._products[kind] = getattr(importlib.import_module(module_name), class_name)
+        pet = product(**self._arguments[kind])
+        if self._is_pooled[kind]:
+            self._pool[kind] = pet
+        return pet
+
+
+_factory = PetFactory()
+_factory.register("dog", Dog, name="Hope")
+_factory.register("cat", Cat, name="Peace")
+
+
 def get_pet(pet: Literal["dog", "cat"]) -> Pet:
     """Factory method."""
-    pets = {
-        "dog": Dog("Hope"),
-        "cat": Cat("Peace"),
-    }
-    return pets[pet]
+    return _factory.create(pet)
+
+
+def benchmark(number: int = 10_000) -> None:
+    """Measure the cost per call, as the number of registered product types grows."""
+    for n_types in (2, 10, 100, 500):
+        products = [type(f"Pet{i}", (Dog,), {}) for i in range(n_types)]
+
+        def build_all() -> Pet:
+            pets = {f"pet-{i}": product(name="Hope") for i, product in enumerate(products)}
+            return pets["pet-0"]
+
+        factory = PetFactory()
+        pooled_factory = PetFactory()
+        for i, product in enumerate(products):
+            factory.register(f"pet-{i}", product, name="Hope")
+            pooled_factory.register(f"pet-{i}", product, pooled=True, name="Hope")
+
+        time_all = timeit.timeit(build_all, number=number // n_types) / (number // n_types)
+        time_factory = timeit.timeit(lambda: factory.create("pet-0"), number=number) / number
+        time_pooled = timeit.timeit(lambda: pooled_factory.create("pet-0"), number=number) / number
+        print(
+            f"{n_types} types: building all {time_all * 1e6:.2f}us, registry {time_factory * 1e6:.2f}us, "
+            f"pooled {time_pooled * 1e6:.2f}us per call"
+        )
 
 
 if __name__ == "__main__":
     print(get_pet("dog").speak())
     print(get_pet("cat").speak())
+
+    factory = PetFactory()
+    factory.register("cat", f"{__name__}:Cat", pooled=True, name="Peace")
+    print(factory.create("cat").speak(), factory.create("cat") is factory.create("cat"))
+
+    benchmark()
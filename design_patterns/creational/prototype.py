@@ -5,26 +5,200 @@ Useful when creating many identical objects is expensive.
 
 from __future__ import annotations
 
+import contextlib
 import copy
-from typing import Any, TypeVar
+import copyreg
+import mmap
+import multiprocessing
+import os
+import pickle
+import tempfile
+import time
+import timeit
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Generic, TypeVar
+
+import numpy as np
 
 ObjectType = TypeVar("ObjectType")
 
+# Exact types, since subclasses of them might be mutable
+_IMMUTABLE_TYPES = (type(None), bool, int, float, complex, str, bytes, range)
+
+
+def _is_immutable(value: Any) -> bool:
+    if type(value) in _IMMUTABLE_TYPES:
+        return True
+    if type(value) in (tuple, frozenset):
+        return all(_is_immutable(item) for item in value)
+    return False
+
+
+def _is_plain(obj: Any) -> bool:
+    """Whether an object is deep-copied by simply copying its `__dict__`, without any customization."""
+    cls = type(obj)
+    if getattr(cls, "__deepcopy__", None) is not None or hasattr(cls, "__setstate__"):
+        return False
+    reduced = obj.__reduce_ex__(4)
+    return (
+        reduced[0] is copyreg.__newobj__
+        and reduced[1] == (cls,)
+        and (reduced[2] is None or reduced[2] is getattr(obj, "__dict__", None))
+        and reduced[3:] == (None, None)
+    )
+
+
+class ClonePlan(Generic[ObjectType]):
+    """Analyze a prototype once, so that its immutable attributes are shared by all clones.
+
+    Only the remaining attributes are deep-copied on every clone. Objects that customize how they are copied are
+    always deep-copied as a whole. Either way, clones reflect the state of the prototype at the time the plan is
+    created, so a prototype that changes must be registered again. Prototypes that cannot change anyway are used
+    without taking a snapshot of them, by passing `snapshot=False`.
+    """
+
+    def __init__(self, obj: ObjectType, *, snapshot: bool = True) -> None:
+        self._prototype = obj
+        self._is_plain = _is_plain(obj)
+        # Copied once here, so that later changes to the prototype are not reflected either
+        self._snapshot = None if self._is_plain else copy.deepcopy(obj) if snapshot else obj
+        state = vars(obj) if self._is_plain else {}
+        self._shared = {name: value for name, value in state.items() if _is_immutable(value)}
+        copied = {name: value for name, value in state.items() if name not in self._shared}
+        self._copied = copy.deepcopy(copied, {id(obj): obj}) if snapshot else copied
+
+    def clone(self, overrides: dict[str, Any]) -> ObjectType:
+        if not self._is_plain:
+            obj = copy.deepcopy(self._snapshot)
+            obj.__dict__.update(overrides)
+            return obj
+
+        cls = type(self._prototype)
+        obj = cls.__new__(cls)
+        obj.__dict__.update(self._shared)
+        if self._copied:
+            copied = {name: value for name, value in self._copied.items() if name not in overrides}
+            # References to the prototype itself become references to the clone
+            obj.__dict__.update(copy.deepcopy(copied, {id(self._prototype): obj}))
+        obj.__dict__.update(overrides)
+        return obj
+
+    def clone_many(self, n: int, overrides: dict[str, Any]) -> list[ObjectType]:
+        if not self._is_plain or self._copied:
+            return [self.clone(overrides) for _ in range(n)]
+
+        # Nothing needs to be copied, so all clones start from the same state
+        cls = type(self._prototype)
+        new = cls.__new__
+        state = {**self._shared, **overrides}
+        objects = [new(cls) for _ in range(n)]
+        for obj in objects:
+            obj.__dict__.update(state)
+        return objects
+
 
 class Prototype:
     def __init__(self) -> None:
-        self._objects: dict[str, ObjectType] = {}
+        self._plans: dict[str, ClonePlan[ObjectType]] = {}
 
     def register_object(self, name: str, obj: ObjectType) -> None:
-        self._objects[name] = obj
+        self._plans[name] = ClonePlan(obj)
 
     def unregister_object(self, name: str) -> None:
-        del self._objects[name]
+        del self._plans[name]
 
-    def clone(self, name: str, **kwargs: Any) -> ObjectType:
-        obj = copy.deepcopy(self._objects[name])
-        obj.__dict__.update(kwargs)
-        return obj
+    def clone(self, name: str, /, **kwargs: Any) -> ObjectType:
+        return self._plans[name].clone(kwargs)
+
+    def clone_many(self, name: str, n: int, /, **kwargs: Any) -> list[ObjectType]:
+        return self._plans[name].clone_many(n, kwargs)
+
+
+class SharedPrototype:
+    """Prototype registry shared by processes, through a memory-mapped file.
+
+    Objects are pickled once when registered, with the buffers that support it, such as those of NumPy arrays, stored
+    out-of-band right after the pickle. Prototypes use these buffers in place from the file, and only their clones
+    copy them. Copies of the registry sent to other processes only carry the small index of the file, and each
+    process deserializes a prototype from the file the first time it clones it. Objects must be registered before
+    the registry is sent to other processes, and only the registry that created the file removes it, when it is
+    closed or garbage collected.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        if path is None:
+            file_descriptor, path = tempfile.mkstemp(suffix=".prototypes")
+            os.close(file_descriptor)
+        self._path = path
+        self._finalizer: weakref.finalize | None = weakref.finalize(self, _remove_file, path)
+        # Offset and size of the pickle of each object, and of its out-of-band buffers
+        self._index: dict[str, tuple[int, int, list[tuple[int, int]]]] = {}
+        self._mmap: mmap.mmap | None = None
+        self._plans: dict[str, ClonePlan[Any]] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        return {"_path": self._path, "_index": self._index}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state, _finalizer=None, _mmap=None, _plans={})
+
+    def __enter__(self) -> SharedPrototype:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def register_object(self, name: str, obj: Any) -> None:
+        buffers: list[pickle.PickleBuffer] = []
+        data = pickle.dumps(obj, protocol=5, buffer_callback=buffers.append)
+        with open(self._path, "ab") as file:
+            offset = file.seek(0, os.SEEK_END)
+            file.write(data)
+            buffer_spans = []
+            for buffer in buffers:
+                raw = buffer.raw()
+                buffer_spans.append((file.tell(), raw.nbytes))
+                file.write(raw)
+        self._index[name] = (offset, len(data), buffer_spans)
+        self._plans.pop(name, None)
+        # The file has grown, so it needs to be mapped again. Objects might still use the previous mapping.
+        self._mmap = None
+
+    def unregister_object(self, name: str) -> None:
+        del self._index[name]
+        self._plans.pop(name, None)
+
+    def clone(self, name: str, /, **kwargs: Any) -> Any:
+        return self._plan(name).clone(kwargs)
+
+    def clone_many(self, name: str, n: int, /, **kwargs: Any) -> list[Any]:
+        return self._plan(name).clone_many(n, kwargs)
+
+    def close(self) -> None:
+        self._plans.clear()
+        self._mmap = None
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def _plan(self, name: str) -> ClonePlan[Any]:
+        plan = self._plans.get(name)
+        if plan is None:
+            if self._mmap is None:
+                with open(self._path, "rb") as file:
+                    self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(self._mmap)
+            offset, size, buffer_spans = self._index[name]
+            buffers = [view[buffer_offset : buffer_offset + buffer_size] for buffer_offset, buffer_size in buffer_spans]
+            obj = pickle.loads(view[offset : offset + size], buffers=buffers)
+            # The prototype is private to the registry, and its buffers are read-only, so it does not need a snapshot
+            plan = self._plans[name] = ClonePlan(obj, snapshot=False)
+        return plan
+
+
+def _remove_file(path: str) -> None:
+    with contextlib.suppress(FileNotFoundError):
+        os.remove(path)
 
 
 class Car:
@@ -37,6 +211,88 @@ class Car:
         return f"{self.name} | {self.color} | {self.options}"
 
 
+def benchmark(n: int = 100_000) -> None:
+    """Compare deep-copying a prototype against following its clone plan."""
+    car = Car()
+    prototype = Prototype()
+    prototype.register_object("skylark", car)
+
+    def deepcopy_cars() -> None:
+        for _ in range(n):
+            clone = copy.deepcopy(car)
+            clone.__dict__.update(options="winter tires")
+
+    def clone_cars() -> None:
+        for _ in range(n):
+            prototype.clone("skylark", options="winter tires")
+
+    time_deepcopy = timeit.timeit(deepcopy_cars, number=1)
+    time_clone = timeit.timeit(clone_cars, number=1)
+    time_clone_many = timeit.timeit(lambda: prototype.clone_many("skylark", n, options="winter tires"), number=1)
+    print(f"{n} cars: deepcopy {time_deepcopy:.3f}s, clone {time_clone:.3f}s, clone_many {time_clone_many:.3f}s")
+
+
+class ConfiguredCar(Car):
+    """Car with a large, mutable configuration, in a NumPy array that protocol 5 pickles out-of-band."""
+
+    def __init__(self, firmware_size: int) -> None:
+        super().__init__()
+        self.firmware = np.zeros(firmware_size, dtype=np.uint8)
+
+
+_worker_registry: Prototype | SharedPrototype | None = None
+
+
+def _initialize_per_process_registry(objects: dict[str, Any]) -> None:
+    global _worker_registry
+    _worker_registry = Prototype()
+    for name, obj in objects.items():
+        _worker_registry.register_object(name, obj)
+
+
+def _initialize_shared_registry(registry: SharedPrototype) -> None:
+    global _worker_registry
+    _worker_registry = registry
+
+
+def _clone(name: str) -> None:
+    _worker_registry.clone(name)
+
+
+def _time_clones(name: str, n: int) -> float:
+    _worker_registry.clone(name)
+    # CPU time, so that workers running at the same time on fewer cores do not distort the latency
+    start = time.process_time()
+    for _ in range(n):
+        _worker_registry.clone(name)
+    return (time.process_time() - start) / n
+
+
+def benchmark_shared(n_workers: int = 4, n_objects: int = 1_000, firmware_size: int = 100 * 2**10) -> None:
+    """Compare worker startup and clone latency, with per-process registries and with a shared registry."""
+    objects = {f"car-{i}": ConfiguredCar(firmware_size) for i in range(n_objects)}
+    shared = SharedPrototype()
+    for name, obj in objects.items():
+        shared.register_object(name, obj)
+
+    # Spawned workers receive their initialization arguments through pickling, like in most process pools.
+    context = multiprocessing.get_context("spawn")
+    modes = {
+        "Per-process": (_initialize_per_process_registry, objects),
+        "Shared": (_initialize_shared_registry, shared),
+    }
+    for mode, (initializer, registry) in modes.items():
+        start = time.perf_counter()
+        with ProcessPoolExecutor(n_workers, mp_context=context, initializer=initializer, initargs=(registry,)) as pool:
+            # Startup lasts until the first clone, which includes deserializing the prototype in shared mode
+            list(pool.map(_clone, ["car-0"] * n_workers))
+            time_startup = time.perf_counter() - start
+            latencies = list(pool.map(_time_clones, ["car-0"] * n_workers, [1_000] * n_workers))
+        latency = sum(latencies) / len(latencies)
+        print(f"{mode} registry: startup {time_startup:.3f}s, clone latency {latency * 1e6:.1f}us")
+    shared.close()
+
+
 if __name__ == "__main__":
     car = Car()
     prototype = Prototype()
@@ -44,3 +300,17 @@ if __name__ == "__main__":
 
     car_cloned = prototype.clone("skylark", options="winter tires")
     print(car_cloned)
+
+    cars = prototype.clone_many("skylark", 3, color="Blue")
+    print(*cars, sep="\n")
+
+    shared = SharedPrototype()
+    shared.register_object("skylark", car)
+    with ProcessPoolExecutor(2, initializer=_initialize_shared_registry, initargs=(shared,)) as pool:
+        for latency in pool.map(_time_clones, ["skylark"] * 2, [1_000] * 2):
+            print(f"Cloned in a worker in {latency * 1e6:.1f}us")
+    print(shared.clone("skylark", color="Green"))
+    shared.close()
+
+    benchmark()
+    benchmark_shared()
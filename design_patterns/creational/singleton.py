@@ -5,7 +5,12 @@ Scenario: An information cache shared by multiple objects.
 
 from __future__ import annotations
 
-from typing import Any
+import heapq
+import sysconfig
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Mapping
 
 
 class Borg:
@@ -27,8 +32,274 @@ class Singleton(Borg):
         return str(self._shared_data)
 
 
+class BoundedCache:
+    """Cache that evicts the least recently used entries beyond a maximum size, and entries older than their TTL.
+
+    Missing entries are optionally loaded on read, by calling `loader` with their key, outside of the lock of the
+    cache. The cache can be shared by threads.
+    """
+
+    def __init__(
+        self,
+        max_size: int = 1024,
+        ttl: float | None = None,
+        loader: Callable[[str], Any] | None = None,
+    ) -> None:
+        self._max_size = max_size
+        self._ttl = ttl
+        self._loader = loader
+        self._lock = threading.Lock()
+        # Values along with their expiry time, from the least to the most recently used
+        self._entries: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+        # Expiry times of the entries, which can be outdated when entries are set again or deleted
+        self._expiries: list[tuple[float, str]] = []
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    @property
+    def expirations(self) -> int:
+        return self._expirations
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expiry = entry
+                if expiry > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+                self._expirations += 1
+            self._misses += 1
+
+        if self._loader is None:
+            raise KeyError(key)
+        value = self._loader(key)
+        self.set(key, value)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        ttl = self._ttl if ttl is None else ttl
+        with self._lock:
+            now = time.monotonic()
+            expiry = now + ttl if ttl is not None else float("inf")
+            self._entries[key] = (value, expiry)
+            self._entries.move_to_end(key)
+            if ttl is not None:
+                heapq.heappush(self._expiries, (expiry, key))
+                if len(self._expiries) > 2 * self._max_size:
+                    self._compact_expiries()
+            # Expired entries go first, before live entries are evicted
+            while len(self._entries) > self._max_size and self._expiries and self._expiries[0][0] <= now:
+                expiry, expired_key = heapq.heappop(self._expiries)
+                entry = self._entries.get(expired_key)
+                if entry is not None and entry[1] == expiry:
+                    del self._entries[expired_key]
+                    self._expirations += 1
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            del self._entries[key]
+
+    def _compact_expiries(self) -> None:
+        """Drop outdated expiry times, so that they take space in proportion to the entries."""
+        self._expiries = [
+            (expiry, entry_key) for entry_key, (_, expiry) in self._entries.items() if expiry < float("inf")
+        ]
+        heapq.heapify(self._expiries)
+
+    def items(self) -> list[tuple[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, expiry) in self._entries.items() if expiry > now]
+
+
+class CachedBorg:
+    """Borg whose attributes are shared through a bounded cache, rather than an ever-growing dictionary.
+
+    Subclasses can share a differently configured cache, by overriding `_shared_cache`.
+    """
+
+    _shared_cache = BoundedCache()
+
+    def __init__(self, **kwargs: Any) -> None:
+        for name, value in kwargs.items():
+            setattr(self, name, value)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("__"):
+            raise AttributeError(name)
+        try:
+            return self._shared_cache.get(name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self._shared_cache.set(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        try:
+            self._shared_cache.delete(name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __str__(self) -> str:
+        return str(dict(self._shared_cache.items()))
+
+
+class StripedDict:
+    """Dictionary that can be read without locking, and is written under one lock per stripe of keys.
+
+    Keys are spread over several locks, so that writers of different keys rarely wait for each other. Reads and
+    single writes rely on the atomicity of dictionary operations, and locks make compound writes atomic.
+    """
+
+    def __init__(self, n_stripes: int = 16) -> None:
+        self.data: dict[str, Any] = {}
+        self._locks = [threading.Lock() for _ in range(n_stripes)]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.data.get(key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        with self._locks[hash(key) % len(self._locks)]:
+            self.data[key] = value
+
+    def update(self, mapping: Mapping[str, Any]) -> None:
+        """Set several keys at once, as seen by other writers."""
+        # Locks are always taken in the same order, to avoid deadlocks
+        indices = sorted({hash(key) % len(self._locks) for key in mapping})
+        for index in indices:
+            self._locks[index].acquire()
+        try:
+            self.data.update(mapping)
+        finally:
+            for index in reversed(indices):
+                self._locks[index].release()
+
+    def get_or_set(self, key: str, factory: Callable[[], Any]) -> Any:
+        """Get the value of a key, or create it exactly once if it is missing."""
+        value = self.data.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._locks[hash(key) % len(self._locks)]:
+            if key not in self.data:
+                self.data[key] = factory()
+            return self.data[key]
+
+    def delete(self, key: str) -> None:
+        with self._locks[hash(key) % len(self._locks)]:
+            del self.data[key]
+
+    def items(self) -> list[tuple[str, Any]]:
+        return list(self.data.items())
+
+
+_MISSING = object()
+
+
+class ThreadSafeBorg:
+    """Borg whose attributes are shared through a `StripedDict`, so that they can be set from any thread.
+
+    Like for `Borg`, the shared dictionary is the attribute dictionary of every instance, so that reads are regular
+    attribute lookups, while writes go through the locks of the `StripedDict`.
+    """
+
+    _shared_data = StripedDict()
+
+    def __init__(self, **kwargs: Any) -> None:
+        object.__setattr__(self, "__dict__", self._shared_data.data)
+        self._shared_data.update(kwargs)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self._shared_data.set(name, value)
+
+    def __delattr__(self, name: str) -> None:
+        try:
+            self._shared_data.delete(name)
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __str__(self) -> str:
+        return str(dict(self._shared_data.items()))
+
+
+def _read_attributes(instance: Any, names: Iterable[str], n_rounds: int, barrier: threading.Barrier) -> None:
+    barrier.wait()
+    for _ in range(n_rounds):
+        for name in names:
+            getattr(instance, name)
+
+
+def benchmark(n_keys: int = 100, n_rounds: int = 2_000) -> None:
+    """Measure how reads of shared attributes scale with the number of threads."""
+    build = "free-threaded" if sysconfig.get_config_var("Py_GIL_DISABLED") else "GIL"
+    names = [f"key_{i}" for i in range(n_keys)]
+    instances = {
+        "Singleton": Singleton(**dict.fromkeys(names, "value")),
+        "ThreadSafeBorg": ThreadSafeBorg(**dict.fromkeys(names, "value")),
+    }
+    for label, instance in instances.items():
+        for n_threads in (1, 2, 4, 8):
+            barrier = threading.Barrier(n_threads + 1)
+            threads = [
+                threading.Thread(target=_read_attributes, args=(instance, names, n_rounds, barrier))
+                for _ in range(n_threads)
+            ]
+            for thread in threads:
+                thread.start()
+            barrier.wait()
+            start = time.perf_counter()
+            for thread in threads:
+                thread.join()
+            reads_per_second = n_threads * n_rounds * n_keys / (time.perf_counter() - start)
+            print(f"{label} ({build} build), {n_threads} threads: {reads_per_second / 1e6:.2f}M reads/s")
+
+
 if __name__ == "__main__":
     x = Singleton(HTTP="Hyper Text Transfer Protocol")
     print(x)
     y = Singleton(SNMP="Simple Network Management Protocol")
     print(y)
+
+    class Protocols(CachedBorg):
+        _shared_cache = BoundedCache(max_size=2, ttl=60.0, loader=lambda name: f"<{name} looked up>")
+
+    x = Protocols(HTTP="Hyper Text Transfer Protocol")
+    y = Protocols(SNMP="Simple Network Management Protocol")
+    print(x.SNMP)
+    print(y.FTP)
+    print(x)
+    cache = Protocols._shared_cache
+    print(f"Hits: {cache.hits}, misses: {cache.misses}, evictions: {cache.evictions}")
+
+    x = ThreadSafeBorg(HTTP="Hyper Text Transfer Protocol")
+    y = ThreadSafeBorg(SNMP="Simple Network Management Protocol")
+    print(x.SNMP, y.HTTP)
+
+    benchmark()
@@ -3,17 +3,46 @@
 from __future__ import annotations
 
 import abc
+import array
+import os
+import queue
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
 
 
 class FileSystemItem(abc.ABC):
     def __init__(self, name: str) -> None:
         self._name = name
+        self._parent: Folder | None = None
+
+    @property
+    @abc.abstractmethod
+    def size(self) -> int: ...
+
+    @property
+    @abc.abstractmethod
+    def n_files(self) -> int: ...
 
     @abc.abstractmethod
     def display(self, *, indent: int = 0) -> None: ...
 
 
 class File(FileSystemItem):
+    def __init__(self, name: str, size: int = 0) -> None:
+        super().__init__(name)
+        self._size = size
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def n_files(self) -> int:
+        return 1
+
     def display(self, *, indent: int = 0) -> None:
         print(" " * indent + f"- File: {self._name}")
 
@@ -21,27 +50,307 @@ class File(FileSystemItem):
 class Folder(FileSystemItem):
     def __init__(self, name: str) -> None:
         super().__init__(name)
-        self._children: list[File] = []
+        # Keyed by identity, so that children can be removed in constant time, in the order they were added
+        self._children: dict[int, FileSystemItem] = {}
+        # Aggregates of the whole subtree, updated whenever a descendant is added or removed
+        self._size = 0
+        self._n_files = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def n_files(self) -> int:
+        return self._n_files
+
+    def display(self, *, indent: int = 0) -> None:
+        for depth, item in self.walk():
+            if isinstance(item, Folder):
+                print(" " * (indent + depth) + f"- Folder: {item._name}")
+            else:
+                item.display(indent=indent + depth)
+
+    def walk(self) -> Iterator[tuple[int, FileSystemItem]]:
+        """Iterate over the subtree in depth-first order, along with the depth of each item."""
+        stack: list[tuple[int, FileSystemItem]] = [(0, self)]
+        while stack:
+            depth, item = stack.pop()
+            yield depth, item
+            if isinstance(item, Folder):
+                stack.extend((depth + 1, child) for child in reversed(item._children.values()))
+
+    def add(self, item: FileSystemItem) -> None:
+        if item._parent is not None:
+            raise ValueError(f"{item._name} must be removed from its folder before being added to another one")
+        ancestor: Folder | None = self
+        while ancestor is not None:
+            if ancestor is item:
+                raise ValueError(f"{item._name} cannot be added to itself or to one of its descendants")
+            ancestor = ancestor._parent
+        item._parent = self
+        self._children[id(item)] = item
+        self._update_aggregates(item.size, item.n_files)
+
+    def remove(self, item: FileSystemItem) -> None:
+        del self._children[id(item)]
+        item._parent = None
+        self._update_aggregates(-item.size, -item.n_files)
+
+    def _update_aggregates(self, size: int, n_files: int) -> None:
+        folder: Folder | None = self
+        while folder is not None:
+            folder._size += size
+            folder._n_files += n_files
+            folder = folder._parent
+
+
+# Index of a missing node in `CompactTree`
+_NO_NODE = -1
+
+
+class CompactTree:
+    """Storage of a whole file system tree in parallel arrays, with interned names.
+
+    Nodes only take a few dozens of bytes each, and are accessed through lightweight views created on demand.
+    """
+
+    def __init__(self) -> None:
+        self._names: list[str] = []
+        self._name_ids: dict[str, int] = {}
+        self._name_id = array.array("i")
+        self._is_folder = array.array("b")
+        self._size = array.array("q")
+        self._n_files = array.array("q")
+        # Children are linked lists of siblings, so that they keep the order in which they were added
+        self._parent = array.array("i")
+        self._first_child = array.array("i")
+        self._last_child = array.array("i")
+        self._next_sibling = array.array("i")
+
+    def __len__(self) -> int:
+        return len(self._name_id)
+
+    def create_file(self, name: str, size: int = 0) -> CompactFile:
+        return CompactFile(self, self._append(name, False, size, 1))
+
+    def create_folder(self, name: str) -> CompactFolder:
+        return CompactFolder(self, self._append(name, True, 0, 0))
+
+    def _append(self, name: str, is_folder: bool, size: int, n_files: int) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        self._name_id.append(name_id)
+        self._is_folder.append(is_folder)
+        self._size.append(size)
+        self._n_files.append(n_files)
+        for links in (self._parent, self._first_child, self._last_child, self._next_sibling):
+            links.append(_NO_NODE)
+        return len(self._name_id) - 1
+
+    def _view(self, index: int) -> CompactFile | CompactFolder:
+        return CompactFolder(self, index) if self._is_folder[index] else CompactFile(self, index)
+
+    def _add(self, parent: int, child: int) -> None:
+        if self._parent[child] != _NO_NODE:
+            raise ValueError(f"{self._names[self._name_id[child]]} is already in a folder")
+        ancestor = parent
+        while ancestor != _NO_NODE:
+            if ancestor == child:
+                raise ValueError(f"{self._names[self._name_id[child]]} cannot be added to itself or its descendants")
+            ancestor = self._parent[ancestor]
+        self._parent[child] = parent
+        if self._last_child[parent] == _NO_NODE:
+            self._first_child[parent] = child
+        else:
+            self._next_sibling[self._last_child[parent]] = child
+        self._last_child[parent] = child
+
+        size, n_files = self._size[child], self._n_files[child]
+        while parent != _NO_NODE:
+            self._size[parent] += size
+            self._n_files[parent] += n_files
+            parent = self._parent[parent]
+
+    def _walk(self, index: int) -> Iterator[tuple[int, int]]:
+        stack = [(0, index)]
+        while stack:
+            depth, index = stack.pop()
+            yield depth, index
+            children = []
+            child = self._first_child[index]
+            while child != _NO_NODE:
+                children.append((depth + 1, child))
+                child = self._next_sibling[child]
+            stack.extend(reversed(children))
+
+
+class CompactFile(FileSystemItem):
+    """View of a file stored in a `CompactTree`."""
+
+    def __init__(self, tree: CompactTree, index: int) -> None:
+        self._tree = tree
+        self._index = index
+
+    @property
+    def _name(self) -> str:
+        return self._tree._names[self._tree._name_id[self._index]]
+
+    @property
+    def size(self) -> int:
+        return self._tree._size[self._index]
+
+    @property
+    def n_files(self) -> int:
+        return self._tree._n_files[self._index]
+
+    def display(self, *, indent: int = 0) -> None:
+        print(" " * indent + f"- File: {self._name}")
+
+
+class CompactFolder(CompactFile):
+    """View of a folder stored in a `CompactTree`."""
 
     def display(self, *, indent: int = 0) -> None:
-        print(" " * indent + f"- Folder: {self._name}")
-        for child in self._children:
-            child.display(indent=indent + 1)
+        for depth, item in self.walk():
+            if isinstance(item, CompactFolder):
+                print(" " * (indent + depth) + f"- Folder: {item._name}")
+            else:
+                item.display(indent=indent + depth)
+
+    def walk(self) -> Iterator[tuple[int, CompactFile | CompactFolder]]:
+        for depth, index in self._tree._walk(self._index):
+            yield depth, self._tree._view(index)
+
+    def add(self, item: CompactFile | CompactFolder) -> None:
+        if item._tree is not self._tree:
+            raise ValueError("Items can only be added to folders of the same tree")
+        self._tree._add(self._index, item._index)
+
+
+def _list_directory(path: str) -> tuple[list[tuple[str, int]], list[tuple[str, str]]]:
+    """List the files of a directory with their sizes, and its subdirectories with their paths."""
+    files: list[tuple[str, int]] = []
+    subdirectories: list[tuple[str, str]] = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append((entry.name, entry.path))
+                else:
+                    files.append((entry.name, entry.stat(follow_symlinks=False).st_size))
+    except OSError:
+        # Like `os.walk`, skip directories that cannot be read
+        pass
+    return files, subdirectories
+
+
+def scan_directory(path: str, *, max_workers: int = 8) -> Folder:
+    """Build a folder tree from a real directory, scanning independent subdirectories in parallel.
 
-    def add(self, file: File) -> None:
-        self._children.append(file)
+    Directories are listed by a pool of threads, while the tree itself is only modified by the calling thread.
+    """
+    root = Folder(os.path.basename(os.path.abspath(path)))
+    listings: queue.SimpleQueue[tuple[Folder, list[tuple[str, int]], list[tuple[str, str]]]] = queue.SimpleQueue()
+
+    def list_directory(folder: Folder, path: str) -> None:
+        listings.put((folder, *_list_directory(path)))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        executor.submit(list_directory, root, path)
+        n_pending = 1
+        while n_pending:
+            folder, files, subdirectories = listings.get()
+            n_pending -= 1
+            for name, size in files:
+                folder.add(File(name, size))
+            for name, subdirectory_path in subdirectories:
+                subfolder = Folder(name)
+                folder.add(subfolder)
+                executor.submit(list_directory, subfolder, subdirectory_path)
+                n_pending += 1
+    return root
+
+
+def benchmark(n_folders: int = 200, n_files_per_folder: int = 50, n_queries: int = 1_000) -> None:
+    """Time scanning a generated directory, and querying the size of the whole tree."""
+    with tempfile.TemporaryDirectory() as directory:
+        for i in range(n_folders):
+            subdirectory = os.path.join(directory, f"folder-{i // 10}", f"folder-{i}")
+            os.makedirs(subdirectory)
+            for j in range(n_files_per_folder):
+                with open(os.path.join(subdirectory, f"file-{j}.txt"), "w") as file:
+                    file.write("x" * j)
+
+        for max_workers in (1, 8):
+            start = time.perf_counter()
+            root = scan_directory(directory, max_workers=max_workers)
+            print(f"Scanned {root.n_files} files with {max_workers} workers in {time.perf_counter() - start:.3f}s")
+
+    start = time.perf_counter()
+    for _ in range(n_queries):
+        size = root.size
+    time_cached = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(n_queries // 100):
+        size = sum(item.size for _, item in root.walk() if isinstance(item, File))
+    time_walked = (time.perf_counter() - start) * 100
+    print(f"{n_queries} size queries of {size} bytes: cached {time_cached:.5f}s, walked {time_walked:.3f}s")
+
+
+def benchmark_compact(n_nodes: int = 10_000_000, n_files_per_folder: int = 99) -> None:
+    """Measure the memory per node of compact trees, against trees of objects (with a hundredth of the nodes)."""
+    n_folders = n_nodes // (n_files_per_folder + 1)
+    file_names = [f"file-{j}.txt" for j in range(n_files_per_folder)]
+
+    tracemalloc.start()
+    tree = CompactTree()
+    root = tree.create_folder("root")
+    for i in range(n_folders):
+        folder = tree.create_folder(f"folder-{i}")
+        root.add(folder)
+        for j, name in enumerate(file_names):
+            folder.add(tree.create_file(name, j))
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"Compact tree: {memory / len(tree):.1f} bytes per node for {len(tree)} nodes")
+
+    tracemalloc.start()
+    root = Folder("root")
+    for i in range(n_folders // 100):
+        folder = Folder(f"folder-{i}")
+        root.add(folder)
+        for j, name in enumerate(file_names):
+            folder.add(File(name, j))
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n_objects = sum(1 for _ in root.walk())
+    print(f"Tree of objects: {memory / n_objects:.1f} bytes per node for {n_objects} nodes")
 
 
 if __name__ == "__main__":
     root = Folder("root")
 
     docs = Folder("Documents")
-    docs.add(File("resume.pdf"))
-    docs.add(File("cover_letter.docx"))
+    docs.add(File("resume.pdf", 120_000))
+    docs.add(File("cover_letter.docx", 30_000))
 
     pics = Folder("Pictures")
-    pics.add(File("vacation.jpg"))
+    pics.add(File("vacation.jpg", 2_000_000))
 
     root.add(docs)
     root.add(pics)
     root.display()
+    print(f"Size: {root.size} bytes in {root.n_files} files")
+
+    tree = CompactTree()
+    root = tree.create_folder("root")
+    docs = tree.create_folder("Documents")
+    docs.add(tree.create_file("resume.pdf", 120_000))
+    root.add(docs)
+    root.display()
+
+    benchmark()
+    benchmark_compact()
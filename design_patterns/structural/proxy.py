@@ -9,7 +9,11 @@ It is a middleman between the user and the object, and it can be used for:
 from __future__ import annotations
 
 import abc
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable
 
 
 class Image(abc.ABC):
@@ -22,27 +26,165 @@ class Image(abc.ABC):
 
 class RealImage(Image):
     def __init__(self, path: str) -> None:
-        self._load_image(path)
+        self._data = self._load_image(path)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._data)
 
     def display(self) -> None:
         print("Here is the image: ...")
 
     @staticmethod
-    def _load_image(path: str) -> None:
+    def _load_image(path: str) -> bytes:
         # Some slow process
         print("Loading image from disk...")
         time.sleep(2)
+        return bytes(2**20)
+
+
+class InFlightLoads:
+    """Share a single in-flight load between concurrent callers asking for the same path.
+
+    Images that are already loaded elsewhere can be looked up before starting a load, and loaded images can be
+    stored before the in-flight load is released, so that callers arriving in between do not load them again.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._futures: dict[str, Future[RealImage]] = {}
+        # Callers that waited for the load of another caller
+        self.n_shared = 0
+
+    def load(
+        self,
+        path: str,
+        lookup: Callable[[str], RealImage | None] | None = None,
+        store: Callable[[str, RealImage], None] | None = None,
+    ) -> RealImage:
+        with self._lock:
+            future = self._futures.get(path)
+            is_leader = future is None
+            if is_leader:
+                image = lookup(path) if lookup is not None else None
+                if image is not None:
+                    return image
+                future = self._futures[path] = Future()
+            else:
+                self.n_shared += 1
+
+        if is_leader:
+            try:
+                image = RealImage(path)
+                if store is not None:
+                    store(path, image)
+                future.set_result(image)
+            except BaseException as error:
+                future.set_exception(error)
+            finally:
+                with self._lock:
+                    del self._futures[path]
+        return future.result()
+
+
+class ImageCache:
+    """Images shared by all proxies, evicted in least-recently-used order under a byte budget."""
+
+    def __init__(self, max_bytes: int = 64 * 2**20) -> None:
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._loads = InFlightLoads()
+        self._images: OrderedDict[str, RealImage] = OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    @property
+    def hits(self) -> int:
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        return self._misses
+
+    @property
+    def evictions(self) -> int:
+        return self._evictions
+
+    @property
+    def shared_loads(self) -> int:
+        """Misses that waited for the load of another caller, rather than loading the image again."""
+        return self._loads.n_shared
+
+    def get(self, path: str) -> RealImage:
+        image = self._lookup(path)
+        if image is None:
+            image = self._loads.load(path, self._lookup, self._store)
+        return image
+
+    def _lookup(self, path: str) -> RealImage | None:
+        with self._lock:
+            image = self._images.get(path)
+            if image is not None:
+                self._images.move_to_end(path)
+                self._hits += 1
+            return image
+
+    def _store(self, path: str, image: RealImage) -> None:
+        with self._lock:
+            self._misses += 1
+            self._images[path] = image
+            self._nbytes += image.nbytes
+            self._evict()
+
+    def _evict(self) -> None:
+        while self._nbytes > self._max_bytes:
+            _, image = self._images.popitem(last=False)
+            self._nbytes -= image.nbytes
+            self._evictions += 1
+
+
+_default_cache = ImageCache()
 
 
 class ProxyImage(Image):
-    def __init__(self, path: str) -> None:
+    def __init__(self, path: str, cache: ImageCache | None = None) -> None:
         self._path = path
-        self._image: RealImage | None = None
+        # The proxy does not keep the image alive itself, so the cache alone bounds memory usage.
+        self._cache = cache or _default_cache
+
+    def load(self) -> None:
+        self._cache.get(self._path)
 
     def display(self) -> None:
-        if self._image is None:
-            self._image = RealImage(self._path)
-        self._image.display()
+        self._cache.get(self._path).display()
+
+
+def prefetch(images: Iterable[ProxyImage], *, max_workers: int = 8) -> None:
+    """Warm up many proxies concurrently, using a bounded thread pool."""
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # Consume the results, so that any loading error is raised here.
+        list(executor.map(ProxyImage.load, images))
+
+
+def benchmark(n_images: int = 4) -> None:
+    """Compare sequential against prefetched warm-up of a gallery."""
+    gallery = [ProxyImage(f"image-{i}.png", ImageCache()) for i in range(n_images)]
+    start = time.perf_counter()
+    for image in gallery:
+        image.load()
+    print(f"Sequential warm-up of {n_images} images: {time.perf_counter() - start:.2f}s")
+
+    cache = ImageCache()
+    gallery = [ProxyImage(f"image-{i}.png", cache) for i in range(n_images)]
+    start = time.perf_counter()
+    prefetch(gallery, max_workers=n_images)
+    print(f"Prefetched warm-up of {n_images} images: {time.perf_counter() - start:.2f}s")
 
 
 if __name__ == "__main__":
@@ -50,3 +192,22 @@ if __name__ == "__main__":
     print("Initialized image")
 
     image.display()
+
+    # Concurrent displays of the same path share a single load
+    images = [ProxyImage("shared.png") for _ in range(3)]
+    threads = [threading.Thread(target=image.display) for image in images]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Proxies of the same path share one cached image, least recently used images are evicted
+    cache = ImageCache(max_bytes=2 * 2**20)
+    for path in ["a.png", "b.png", "a.png", "c.png", "b.png"]:
+        ProxyImage(path, cache).display()
+    print(
+        f"Cache hits: {cache.hits}, misses: {cache.misses}, shared loads: {cache.shared_loads}, "
+        f"evictions: {cache.evictions}"
+    )
+
+    benchmark()